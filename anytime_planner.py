@@ -0,0 +1,170 @@
+import heapq
+import threading
+import time
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+from occupancy_grid import COST_TABLE
+from search_engines import SearchStats, flat_cells, flat_masks, neighbor_moves
+
+INF = float('inf')
+
+class CancelToken:
+    # Shared between the caller and a running search. cancel() may be called
+    # from any thread; the search polls expired() every few hundred
+    # expansions and then returns the best path it has so far.
+    def __init__(self, time_limit: Optional[float] = None):
+        self._event = threading.Event()
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    
+    def cancel(self):
+        self._event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+    
+    def expired(self) -> bool:
+        return self._event.is_set() or (self.deadline is not None and time.perf_counter() >= self.deadline)
+
+class AnytimeResult:
+    def __init__(self, path: Optional[List[Tuple[int, int]]] = None, epsilon: float = INF,
+                 complete: bool = False, iterations: int = 0, nodes_expanded: int = 0):
+        self.path = path
+        self.epsilon = epsilon
+        self.complete = complete
+        self.iterations = iterations
+        self.nodes_expanded = nodes_expanded
+    
+    @property
+    def optimal(self) -> bool:
+        return self.complete and self.epsilon <= 1.0
+    
+    def __repr__(self):
+        length = len(self.path) if self.path else None
+        return (f"AnytimeResult(length={length}, epsilon={self.epsilon:.3f}, complete={self.complete}, "
+                f"iterations={self.iterations}, nodes_expanded={self.nodes_expanded})")
+
+def ara_star(cells: np.ndarray, start: Tuple[int, int], end: Tuple[int, int],
+             token: Optional[CancelToken] = None, epsilon: float = 3.0, epsilon_step: float = 0.5,
+             on_improve: Optional[Callable[[AnytimeResult], None]] = None,
+             stats: Optional[SearchStats] = None, check_interval: int = 256,
+             masks: Optional[np.ndarray] = None, min_cost: int = 1) -> AnytimeResult:
+    # Anytime Repairing A* (Likhachev et al.): a quick weighted search with
+    # f = g + epsilon * h, then repeated with a smaller epsilon, reusing the
+    # previous search. Cells whose cost improves after they were closed are
+    # parked in INCONS and only reopened for the next epsilon. Each published
+    # path costs at most `epsilon` times the optimum, where epsilon is
+    # tightened by the lowest g + h still open. Entering a cell costs
+    # COST_TABLE[value] and h is Manhattan distance times min_cost, as in
+    # dial_search, so on unit-cost maps the cost is the path length.
+    rows, cols = cells.shape
+    start_idx = int(start[0]) * cols + int(start[1])
+    end_idx = int(end[0]) * cols + int(end[1])
+    if start_idx == end_idx:
+        result = AnytimeResult([divmod(start_idx, cols)], epsilon=1.0, complete=True, iterations=1)
+        if on_improve is not None:
+            on_improve(result)
+        return result
+    grid = flat_cells(cells)
+    costs = COST_TABLE
+    mask_of = flat_masks(cells, masks)
+    moves = neighbor_moves(cols)
+    end_row, end_col = end_idx // cols, end_idx % cols
+    result = AnytimeResult()
+    
+    def heuristic(idx: int) -> int:
+        row, col = divmod(idx, cols)
+        return min_cost * (abs(row - end_row) + abs(col - end_col))
+    
+    def publish(bound: float):
+        path = [divmod(end_idx, cols)]
+        idx = end_idx
+        while idx != start_idx:
+            idx = parent[idx]
+            path.append(divmod(idx, cols))
+        path.reverse()
+        result.path = path
+        result.epsilon = bound
+        if on_improve is not None:
+            on_improve(result)
+    
+    g_cost = {start_idx: 0}
+    parent = {}
+    closed = set()
+    incons = set()
+    h = heuristic(start_idx)
+    open_list = [(epsilon * h, h, 0, start_idx)]
+    expanded = 0
+    pushes = 1
+    pops = 0
+    peak_open = 1
+    interrupted = False
+    published_g = INF
+    
+    while True:
+        result.iterations += 1
+        # ImprovePath: expand while something open could still beat the goal.
+        goal_g = g_cost.get(end_idx, INF)
+        while open_list and open_list[0][0] < goal_g:
+            _, _, g, idx = heapq.heappop(open_list)
+            pops += 1
+            if idx in closed or g != g_cost[idx]:
+                continue
+            closed.add(idx)
+            expanded += 1
+            if expanded % check_interval == 0 and token is not None and token.expired():
+                interrupted = True
+                break
+            
+            row, col = divmod(idx, cols)
+            for dr, dc, offset in moves[mask_of[idx]]:
+                neighbor = idx + offset
+                tentative_g = g + costs[grid[neighbor]]
+                if tentative_g >= g_cost.get(neighbor, INF):
+                    continue
+                g_cost[neighbor] = tentative_g
+                parent[neighbor] = idx
+                if neighbor in closed:
+                    incons.add(neighbor)
+                else:
+                    h = min_cost * (abs(row + dr - end_row) + abs(col + dc - end_col))
+                    heapq.heappush(open_list, (tentative_g + epsilon * h, h, tentative_g, neighbor))
+                    pushes += 1
+            if len(open_list) > peak_open:
+                peak_open = len(open_list)
+            goal_g = g_cost.get(end_idx, INF)
+        if interrupted:
+            break
+        
+        if end_idx not in g_cost:
+            # The open list ran dry without reaching the goal: unreachable.
+            break
+        live = {idx for _, _, g, idx in open_list if idx not in closed and g == g_cost[idx]}
+        live |= incons
+        lowest = min((g_cost[idx] + heuristic(idx) for idx in live), default=INF)
+        bound = max(1.0, min(epsilon, g_cost[end_idx] / lowest))
+        if result.path is None or bound < result.epsilon or g_cost[end_idx] < published_g:
+            publish(bound)
+            published_g = g_cost[end_idx]
+        # With nothing left open or inconsistent every g value is exact.
+        if result.epsilon <= 1.0 or not live:
+            result.complete = True
+            break
+        if token is not None and token.expired():
+            break
+        
+        epsilon = max(1.0, epsilon - epsilon_step)
+        open_list = []
+        for idx in live:
+            h = heuristic(idx)
+            open_list.append((g_cost[idx] + epsilon * h, h, g_cost[idx], idx))
+        heapq.heapify(open_list)
+        closed.clear()
+        incons.clear()
+    
+    if result.path is None and not interrupted and not (token is not None and token.expired()):
+        result.complete = True
+    result.nodes_expanded = expanded
+    if stats is not None:
+        stats.record_search(expanded, pushes, pops, peak_open)
+    return result
@@ -0,0 +1,158 @@
+import itertools
+import multiprocessing
+import os
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+from typing import Iterable, Iterator, List, Tuple, Optional
+from occupancy_grid import OBSTACLE, build_neighbor_masks
+from search_engines import SEARCH_ENGINES, WEIGHTED_ENGINES, SearchWorkspace, flat_masks, neighbor_moves, reconstruct_path
+
+Query = Tuple[Tuple[int, int], Tuple[int, int]]
+Path = Optional[List[Tuple[int, int]]]
+
+_worker_state = {}
+
+def _query_is_valid(cells: np.ndarray, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+    rows, cols = cells.shape
+    for row, col in (start, end):
+        if not (0 <= row < rows and 0 <= col < cols) or cells[row, col] == OBSTACLE:
+            return False
+    return True
+
+def multi_target_paths(cells: np.ndarray, start: Tuple[int, int], targets: List[Tuple[int, int]],
+                       workspace: SearchWorkspace, masks: Optional[np.ndarray] = None) -> dict:
+    # One breadth-first shortest-path tree from the shared source answers
+    # every target; the search stops as soon as the last target is reached.
+    rows, cols = cells.shape
+    mask_of = flat_masks(cells, masks)
+    moves = neighbor_moves(cols)
+    generation = workspace.next_generation()
+    seen = workspace.seen
+    parent = workspace.parent
+    
+    start_idx = start[0] * cols + start[1]
+    remaining = {row * cols + col for row, col in targets}
+    remaining.discard(start_idx)
+    seen[start_idx] = generation
+    frontier = deque([start_idx])
+    
+    while frontier and remaining:
+        idx = frontier.popleft()
+        for _, _, offset in moves[mask_of[idx]]:
+            neighbor = idx + offset
+            if seen[neighbor] == generation:
+                continue
+            seen[neighbor] = generation
+            parent[neighbor] = idx
+            remaining.discard(neighbor)
+            frontier.append(neighbor)
+    
+    paths = {}
+    for target in targets:
+        target_idx = target[0] * cols + target[1]
+        if seen[target_idx] == generation:
+            paths[target] = reconstruct_path(parent, start_idx, target_idx, cols)
+        else:
+            paths[target] = None
+    return paths
+
+def solve_queries(cells: np.ndarray, queries: List[Query], engine: str,
+                  workspace: Optional[SearchWorkspace] = None,
+                  masks: Optional[np.ndarray] = None) -> List[Path]:
+    if workspace is None:
+        workspace = SearchWorkspace(*cells.shape)
+    if masks is None:
+        masks = build_neighbor_masks(cells)
+    search = SEARCH_ENGINES[engine]
+    results = [None] * len(queries)
+    
+    by_source = {}
+    for position, (start, end) in enumerate(queries):
+        if _query_is_valid(cells, start, end):
+            by_source.setdefault(start, []).append(position)
+    
+    for start, positions in by_source.items():
+        targets = {queries[position][1] for position in positions}
+        if len(targets) == 1:
+            path = search(cells, start, queries[positions[0]][1], workspace=workspace, masks=masks)
+            for position in positions:
+                results[position] = list(path) if path else None
+            continue
+        if engine in WEIGHTED_ENGINES:
+            # The shared breadth-first tree is only shortest on unit-cost maps.
+            paths = {target: search(cells, start, target, workspace=workspace, masks=masks) for target in targets}
+        else:
+            paths = multi_target_paths(cells, start, list(targets), workspace, masks)
+        for position in positions:
+            path = paths[queries[position][1]]
+            results[position] = list(path) if path else None
+    return results
+
+def _init_worker(shm_name: str, shape: Tuple[int, int], engine: str):
+    # The block holds the cells followed by their neighbor masks; both are
+    # mapped read-only, so workers keep no private grid-sized copies.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    shared = np.ndarray((2,) + tuple(shape), dtype=np.uint8, buffer=shm.buf)
+    shared.setflags(write=False)
+    _worker_state['shm'] = shm
+    _worker_state['cells'] = shared[0]
+    _worker_state['masks'] = shared[1]
+    _worker_state['engine'] = engine
+    _worker_state['workspace'] = SearchWorkspace(*shape)
+
+def _solve_chunk(queries: List[Query]) -> List[Path]:
+    return solve_queries(_worker_state['cells'], queries, _worker_state['engine'],
+                         _worker_state['workspace'], _worker_state['masks'])
+
+def _chunked(queries: Iterable[Query], chunk_size: int) -> Iterator[List[Query]]:
+    iterator = iter(queries)
+    while True:
+        chunk = [(tuple(start), tuple(end)) for start, end in itertools.islice(iterator, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+def iter_batch_pathfind(cells: np.ndarray, queries: Iterable[Query], workers: Optional[int] = None,
+                        engine: str = 'array', chunk_size: int = 256,
+                        masks: Optional[np.ndarray] = None) -> Iterator[Path]:
+    if engine not in SEARCH_ENGINES:
+        raise ValueError(f"Unknown search engine: {engine}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    if masks is None:
+        masks = build_neighbor_masks(cells)
+    if workers <= 1:
+        workspace = SearchWorkspace(*cells.shape)
+        for chunk in _chunked(queries, chunk_size):
+            yield from solve_queries(cells, chunk, engine, workspace, masks)
+        return
+    
+    shm = shared_memory.SharedMemory(create=True, size=2 * cells.nbytes)
+    shared = None
+    pool = None
+    try:
+        shared = np.ndarray((2,) + cells.shape, dtype=np.uint8, buffer=shm.buf)
+        shared[0] = cells
+        shared[1] = masks
+        pool = multiprocessing.get_context().Pool(
+            workers, initializer=_init_worker, initargs=(shm.name, cells.shape, engine))
+        
+        # Keep a bounded number of chunks in flight so an unbounded query
+        # iterator is consumed lazily instead of being queued all at once.
+        pending = deque()
+        max_pending = workers * 2
+        for chunk in _chunked(queries, chunk_size):
+            pending.append(pool.apply_async(_solve_chunk, (chunk,)))
+            while len(pending) >= max_pending:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        del shared
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,212 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from map_format import save_binary
+from occupancy_grid import OccupancyGrid, FREE, OBSTACLE
+from pathfinding_car import CarPathfinder
+from search_engines import SearchStats
+
+ENGINES = ('array', 'jps', 'bidirectional', 'alt')
+MAX_SIZE = 10_000
+# Memory is sampled with tracemalloc on the first few queries only; tracing
+# slows allocation-heavy code enough to distort the latency numbers.
+MEMORY_SAMPLES = 10
+
+def tiled_floor(rows: int, cols: int, grid_file: str = 'floor2.csv') -> np.ndarray:
+    floor = OccupancyGrid.from_csv(grid_file).cells
+    reps = (-(-rows // floor.shape[0]), -(-cols // floor.shape[1]))
+    return np.ascontiguousarray(np.tile(floor, reps)[:rows, :cols])
+
+def random_maze(rows: int, cols: int, seed: int = 0) -> np.ndarray:
+    # Binary-tree maze: rooms sit on odd coordinates and each room knocks
+    # down its north or its east wall, which gives a perfect maze and can be
+    # generated for 10k x 10k maps without a Python-level loop per cell.
+    rng = np.random.default_rng(seed)
+    cells = np.full((rows, cols), OBSTACLE, dtype=np.uint8)
+    room_rows = np.arange(1, rows - 1, 2)
+    room_cols = np.arange(1, cols - 1, 2)
+    cells[np.ix_(room_rows, room_cols)] = FREE
+    if room_rows.size == 0 or room_cols.size == 0:
+        return cells
+    go_north = rng.random((room_rows.size, room_cols.size)) < 0.5
+    go_north[0, :] = False
+    go_north[:, -1] = True
+    go_north[0, -1] = False
+    north_r, north_c = np.nonzero(go_north)
+    cells[room_rows[north_r] - 1, room_cols[north_c]] = FREE
+    east_r, east_c = np.nonzero(~go_north)
+    east_mask = east_c < room_cols.size - 1
+    cells[room_rows[east_r[east_mask]], room_cols[east_c[east_mask]] + 1] = FREE
+    return cells
+
+def open_halls(rows: int, cols: int, seed: int = 0, hall_size: int = 64,
+               door_width: int = 4, pillar_density: float = 0.02) -> np.ndarray:
+    # Large open rooms separated by one-cell walls with a door on every wall
+    # segment, plus scattered pillars.
+    rng = np.random.default_rng(seed)
+    cells = (rng.random((rows, cols)) < pillar_density).astype(np.uint8)
+    cells[::hall_size, :] = OBSTACLE
+    cells[:, ::hall_size] = OBSTACLE
+    for wall_row in range(0, rows, hall_size):
+        for col0 in range(0, cols, hall_size):
+            door = col0 + 1 + int(rng.integers(0, max(hall_size - door_width - 1, 1)))
+            cells[wall_row, door:door + door_width] = FREE
+    for wall_col in range(0, cols, hall_size):
+        for row0 in range(0, rows, hall_size):
+            door = row0 + 1 + int(rng.integers(0, max(hall_size - door_width - 1, 1)))
+            cells[door:door + door_width, wall_col] = FREE
+    return cells
+
+def make_map(kind: str, size: int, seed: int = 0) -> np.ndarray:
+    if size > MAX_SIZE:
+        raise ValueError(f"Synthetic maps are limited to {MAX_SIZE}x{MAX_SIZE}")
+    if kind == 'tiled':
+        return tiled_floor(size, size)
+    if kind == 'maze':
+        return random_maze(size, size, seed)
+    if kind == 'halls':
+        return open_halls(size, size, seed)
+    raise ValueError(f"Unknown map kind: {kind}")
+
+def sample_queries(pathfinder: CarPathfinder, count: int, seed: int) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    # Endpoints are drawn from the largest component so every query is a real
+    # search rather than an instant reachability rejection.
+    labels = pathfinder.components.labels
+    largest = max(pathfinder.components.sizes, key=pathfinder.components.sizes.get)
+    candidates = np.flatnonzero(labels.reshape(-1) == largest)
+    rng = random.Random(seed)
+    cols = pathfinder.cols
+    return [(divmod(int(rng.choice(candidates)), cols), divmod(int(rng.choice(candidates)), cols))
+            for _ in range(count)]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def check_path(pathfinder: CarPathfinder, path, start, end, expected_length: Optional[int]) -> Optional[str]:
+    if path is None or expected_length is None:
+        return None if (path is None) == (expected_length is None) else "reachability differs from reference"
+    if len(path) != expected_length:
+        return f"length {len(path)} != reference {expected_length}"
+    if tuple(path[0]) != tuple(start) or tuple(path[-1]) != tuple(end):
+        return "path does not join start and end"
+    for (r1, c1), (r2, c2) in zip(path, path[1:]):
+        if abs(r1 - r2) + abs(c1 - c2) != 1 or pathfinder.grid.is_blocked(r2, c2):
+            return "path contains an invalid step"
+    return None
+
+def run_engine(pathfinder: CarPathfinder, engine: str, queries, expected: List[Optional[int]]) -> Dict:
+    stats = SearchStats()
+    latencies = []
+    failures = []
+    for (start, end), expected_length in zip(queries, expected):
+        started = time.perf_counter()
+        path = pathfinder.astar_pathfind(start, end, engine, stats)
+        latencies.append(time.perf_counter() - started)
+        problem = check_path(pathfinder, path, start, end, expected_length)
+        if problem:
+            failures.append((start, end, problem))
+    
+    tracemalloc.start()
+    peak = 0
+    for start, end in queries[:MEMORY_SAMPLES]:
+        tracemalloc.reset_peak()
+        pathfinder.astar_pathfind(start, end, engine)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'engine': engine,
+        'p50': percentile(latencies, 0.50),
+        'p90': percentile(latencies, 0.90),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1] if latencies else 0.0,
+        'expanded': stats.nodes_expanded,
+        'expansions_per_second': stats.nodes_expanded / total if total else 0.0,
+        'peak_bytes': peak,
+        'failures': failures,
+    }
+
+def benchmark_map(name: str, grid_file: str, queries: int = 200, seed: int = 42,
+                  engines=ENGINES, reference: str = 'reference') -> List[Dict]:
+    pathfinder = CarPathfinder(grid_file, cache_size=0)
+    pairs = sample_queries(pathfinder, queries, seed)
+    if 'alt' in engines:
+        pathfinder.build_landmarks()
+    
+    started = time.perf_counter()
+    expected = []
+    for start, end in pairs:
+        path = pathfinder.astar_pathfind(start, end, reference)
+        expected.append(len(path) if path else None)
+    reference_time = time.perf_counter() - started
+    
+    print(f"\n{name}: {pathfinder.rows}x{pathfinder.cols}, {queries} queries "
+          f"(reference '{reference}' took {reference_time:.2f} s)")
+    print(f"{'Engine':<15}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+          f"{'Expanded':>12}{'Exp/s':>12}{'Peak KiB':>10}  Check")
+    results = []
+    for engine in engines:
+        result = run_engine(pathfinder, engine, pairs, expected)
+        results.append(result)
+        check = "ok" if not result['failures'] else f"{len(result['failures'])} FAILED"
+        print(f"{engine:<15}{result['p50'] * 1000:>10.3f}{result['p90'] * 1000:>10.3f}"
+              f"{result['p99'] * 1000:>10.3f}{result['max'] * 1000:>10.3f}{result['expanded']:>12}"
+              f"{result['expansions_per_second']:>12.0f}{result['peak_bytes'] / 1024:>10.0f}  {check}")
+        for start, end, problem in result['failures'][:5]:
+            print(f"    {start} -> {end}: {problem}")
+    return results
+
+def run_suite(maps=('floor2', 'tiled', 'maze', 'halls'), size: int = 1024, queries: int = 200,
+              seed: int = 42, engines=ENGINES, reference: str = 'reference') -> Dict[str, List[Dict]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in maps:
+            if kind == 'floor2':
+                grid_file = 'floor2.csv'
+                name = 'floor2'
+            else:
+                grid_file = os.path.join(workdir, f"{kind}.grid")
+                save_binary(make_map(kind, size, seed), grid_file)
+                name = f"{kind} {size}x{size}"
+            results[name] = benchmark_map(name, grid_file, queries, seed, engines, reference)
+    if any(result['failures'] for engine_results in results.values() for result in engine_results):
+        print("\nWARNING: some engines returned paths that differ from the reference engine!")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pathfinding engines.")
+    parser.add_argument('--maps', nargs='+', default=['floor2', 'tiled', 'maze', 'halls'],
+                        choices=['floor2', 'tiled', 'maze', 'halls'])
+    parser.add_argument('--size', type=int, default=1024, help=f"synthetic map side length (max {MAX_SIZE})")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES))
+    parser.add_argument('--reference', default='reference',
+                        help="engine whose path lengths every other engine is checked against")
+    parser.add_argument('--save-map', metavar='FILE',
+                        help="write the first synthetic map to FILE (.csv or .grid) and exit")
+    args = parser.parse_args()
+    
+    if args.save_map:
+        kind = next((kind for kind in args.maps if kind != 'floor2'), 'maze')
+        cells = make_map(kind, args.size, args.seed)
+        if args.save_map.endswith('.csv'):
+            OccupancyGrid(cells).to_csv(args.save_map)
+        else:
+            save_binary(cells, args.save_map)
+        print(f"Wrote {kind} {args.size}x{args.size} map to {args.save_map}")
+        return
+    run_suite(args.maps, args.size, args.queries, args.seed, args.engines, args.reference)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import random
+import time
+from pathfinding_car import CarPathfinder
+from search_engines import SearchStats
+
+def benchmark_landmarks(grid_file: str = 'floor2.csv', queries: int = 200, landmarks: int = 8, seed: int = 42):
+    pathfinder = CarPathfinder(grid_file, cache_size=0)
+    free_cells = [(row, col) for row in range(pathfinder.rows) for col in range(pathfinder.cols)
+                  if not pathfinder.grid.is_blocked(row, col)]
+    rng = random.Random(seed)
+    pairs = [(rng.choice(free_cells), rng.choice(free_cells)) for _ in range(queries)]
+    
+    start_time = time.perf_counter()
+    pathfinder.build_landmarks(landmarks)
+    build_time = time.perf_counter() - start_time
+    print(f"Grid: {pathfinder.rows}x{pathfinder.cols}, {queries} queries, {landmarks} landmarks")
+    print(f"Landmark precomputation: {build_time * 1000:.1f} ms")
+    print()
+    print(f"{'Heuristic':<12}{'Expanded':>12}{'Time (ms)':>12}")
+    
+    results = {}
+    for engine, label in (('array', 'Manhattan'), ('alt', 'ALT')):
+        stats = SearchStats()
+        start_time = time.perf_counter()
+        lengths = [len(path) if path else None
+                   for path in (pathfinder.astar_pathfind(start, end, engine, stats) for start, end in pairs)]
+        elapsed = time.perf_counter() - start_time
+        results[engine] = (stats.nodes_expanded, lengths)
+        print(f"{label:<12}{stats.nodes_expanded:>12}{elapsed * 1000:>12.1f}")
+    
+    manhattan_expanded, manhattan_lengths = results['array']
+    alt_expanded, alt_lengths = results['alt']
+    if manhattan_lengths != alt_lengths:
+        print("\nWARNING: ALT returned different path lengths!")
+    if manhattan_expanded:
+        print(f"\nExpansions reduced by {100 * (1 - alt_expanded / manhattan_expanded):.1f}%")
+
+if __name__ == "__main__":
+    benchmark_landmarks()
@@ -0,0 +1,113 @@
+from bisect import bisect_right
+from collections.abc import Sequence
+from typing import Iterable, Iterator, List, Tuple
+
+DIRECTION_NAMES = {
+    (-1, 0): "UP",
+    (1, 0): "DOWN",
+    (0, -1): "LEFT",
+    (0, 1): "RIGHT",
+    (0, 0): "WAIT"
+}
+
+class CompactPath(Sequence):
+    # A path stored as its start cell plus runs of identical moves
+    # (dr, dc, count), so memory grows with the number of turns rather than
+    # the number of cells. It behaves like the usual list of (row, col)
+    # tuples: len() counts cells, indexing finds the run by bisection and
+    # iteration expands the coordinates lazily.
+    __slots__ = ('start', 'runs', '_anchors', '_offsets', '_moves')
+    
+    def __init__(self, start: Tuple[int, int], runs: Iterable[Tuple[int, int, int]] = ()):
+        self.start = (int(start[0]), int(start[1]))
+        self.runs: List[Tuple[int, int, int]] = []
+        self._anchors: List[Tuple[int, int]] = []
+        self._offsets: List[int] = []
+        self._moves = 0
+        for dr, dc, count in runs:
+            self.append(dr, dc, count)
+    
+    @classmethod
+    def from_cells(cls, cells: Iterable[Tuple[int, int]]) -> 'CompactPath':
+        iterator = iter(cells)
+        try:
+            row, col = next(iterator)
+        except StopIteration:
+            raise ValueError("A path needs at least one cell") from None
+        path = cls((row, col))
+        row, col = path.start
+        for next_row, next_col in iterator:
+            path.append(int(next_row) - row, int(next_col) - col)
+            row, col = int(next_row), int(next_col)
+        return path
+    
+    def append(self, dr: int, dc: int, count: int = 1):
+        if (dr, dc) not in DIRECTION_NAMES:
+            raise ValueError(f"Not a single grid move: {(dr, dc)}")
+        if count < 1:
+            raise ValueError("Run length must be at least 1")
+        if self.runs and self.runs[-1][:2] == (dr, dc):
+            self.runs[-1] = (dr, dc, self.runs[-1][2] + count)
+        else:
+            self._anchors.append(self.end)
+            self._offsets.append(self._moves)
+            self.runs.append((dr, dc, count))
+        self._moves += count
+    
+    @property
+    def end(self) -> Tuple[int, int]:
+        if not self.runs:
+            return self.start
+        (row, col), (dr, dc, count) = self._anchors[-1], self.runs[-1]
+        return row + dr * count, col + dc * count
+    
+    def __len__(self) -> int:
+        return self._moves + 1
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("path index out of range")
+        if index == 0:
+            return self.start
+        run = bisect_right(self._offsets, index - 1) - 1
+        (row, col), (dr, dc, _) = self._anchors[run], self.runs[run]
+        steps = index - self._offsets[run]
+        return row + dr * steps, col + dc * steps
+    
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        row, col = self.start
+        yield row, col
+        for dr, dc, count in self.runs:
+            for _ in range(count):
+                row += dr
+                col += dc
+                yield row, col
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CompactPath):
+            return self.start == other.start and self.runs == other.runs
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and all(tuple(a) == b for a, b in zip(other, self))
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"CompactPath(start={self.start}, runs={len(self.runs)}, cells={len(self)})"
+    
+    def segments(self) -> Iterator[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        # (first cell, last cell) of every straight run.
+        for (row, col), (dr, dc, count) in zip(self._anchors, self.runs):
+            yield (row, col), (row + dr * count, col + dc * count)
+    
+    def waypoints(self) -> List[Tuple[int, int]]:
+        # The start cell and the cell where every run ends: the corners of the route.
+        return [self.start] + self._anchors[1:] + [self.end] if self.runs else [self.start]
+    
+    def instructions(self) -> List[str]:
+        return [DIRECTION_NAMES[(dr, dc)] if count == 1 else f"{DIRECTION_NAMES[(dr, dc)]} x{count}"
+                for dr, dc, count in self.runs]
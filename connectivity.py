@@ -0,0 +1,181 @@
+from collections import deque
+import numpy as np
+from typing import List, Tuple
+from occupancy_grid import OccupancyGrid, OBSTACLE
+from search_engines import STEPS
+
+UNLABELED = -1
+
+def _find(parents: List[int], node: int) -> int:
+    while parents[node] != node:
+        parents[node] = parents[parents[node]]
+        node = parents[node]
+    return node
+
+def label_components(passable: np.ndarray) -> Tuple[np.ndarray, int]:
+    # Scanline labeling: each horizontal run of free cells is one node, runs
+    # that overlap between neighbouring rows are unioned, so the Python-level
+    # work scales with the number of runs rather than the number of cells.
+    rows, cols = passable.shape
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = passable
+    edges = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)
+    
+    run_count = len(run_rows)
+    parents = list(range(run_count))
+    row_bounds = np.searchsorted(run_rows, np.arange(rows + 1))
+    starts = run_starts.tolist()
+    ends = run_ends.tolist()
+    
+    for row in range(rows - 1):
+        i, i_end = row_bounds[row], row_bounds[row + 1]
+        j, j_end = row_bounds[row + 1], row_bounds[row + 2]
+        while i < i_end and j < j_end:
+            if starts[i] < ends[j] and starts[j] < ends[i]:
+                root_i = _find(parents, i)
+                root_j = _find(parents, j)
+                if root_i != root_j:
+                    parents[root_j] = root_i
+            if ends[i] < ends[j]:
+                i += 1
+            else:
+                j += 1
+    
+    roots = np.array([_find(parents, run) for run in range(run_count)], dtype=np.int64)
+    _, run_labels = np.unique(roots, return_inverse=True)
+    labels = np.full((rows, cols), UNLABELED, dtype=np.int32)
+    labels[passable] = np.repeat(run_labels.astype(np.int32), run_ends - run_starts)
+    return labels, int(run_labels.max()) + 1 if run_count else 0
+
+class ComponentIndex:
+    def __init__(self, grid: OccupancyGrid):
+        self.grid = grid
+        self.rebuild()
+        grid.add_listener(self.on_cell_changed)
+    
+    def rebuild(self):
+        self.labels, count = label_components(self.grid.passable_mask())
+        counts = np.bincount(self.labels[self.labels >= 0], minlength=count)
+        self.sizes = {label: int(size) for label, size in enumerate(counts)}
+        self._next_label = count
+    
+    def detach(self):
+        self.grid.remove_listener(self.on_cell_changed)
+    
+    def label(self, position: Tuple[int, int]) -> int:
+        return int(self.labels[position[0], position[1]])
+    
+    def connected(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        label = self.labels[start[0], start[1]]
+        return label != UNLABELED and label == self.labels[end[0], end[1]]
+    
+    def component_count(self) -> int:
+        return len(self.sizes)
+    
+    def _new_label(self) -> int:
+        label = self._next_label
+        self._next_label += 1
+        return label
+    
+    def _free_neighbors(self, row: int, col: int) -> List[Tuple[int, int]]:
+        neighbors = []
+        for dr, dc in STEPS:
+            n_row, n_col = row + dr, col + dc
+            if (0 <= n_row < self.grid.rows and 0 <= n_col < self.grid.cols and
+                    self.labels[n_row, n_col] != UNLABELED):
+                neighbors.append((n_row, n_col))
+        return neighbors
+    
+    def on_cell_changed(self, row: int, col: int, old: int, new: int):
+        if (old == OBSTACLE) == (new == OBSTACLE):
+            return
+        if new == OBSTACLE:
+            self._remove_cell(row, col)
+        else:
+            self._add_cell(row, col)
+    
+    def _relabel(self, seeds: List[Tuple[int, int]], old_label: int, new_label: int) -> int:
+        labels = self.labels
+        frontier = deque(seeds)
+        for row, col in seeds:
+            labels[row, col] = new_label
+        count = len(seeds)
+        while frontier:
+            row, col = frontier.popleft()
+            for n_row, n_col in self._free_neighbors(row, col):
+                if labels[n_row, n_col] == old_label:
+                    labels[n_row, n_col] = new_label
+                    frontier.append((n_row, n_col))
+                    count += 1
+        return count
+    
+    def _add_cell(self, row: int, col: int):
+        neighbor_labels = {int(self.labels[r, c]) for r, c in self._free_neighbors(row, col)}
+        if not neighbor_labels:
+            label = self._new_label()
+            self.labels[row, col] = label
+            self.sizes[label] = 1
+            return
+        
+        # Merge every touching component into the largest one, relabeling
+        # only the smaller ones.
+        target = max(neighbor_labels, key=lambda label: self.sizes[label])
+        self.labels[row, col] = target
+        self.sizes[target] += 1
+        for label in neighbor_labels - {target}:
+            seeds = [(r, c) for r, c in self._free_neighbors(row, col) if self.labels[r, c] == label]
+            self.sizes[target] += self._relabel(seeds, label, target)
+            del self.sizes[label]
+    
+    def _remove_cell(self, row: int, col: int):
+        label = int(self.labels[row, col])
+        self.labels[row, col] = UNLABELED
+        self.sizes[label] -= 1
+        if self.sizes[label] == 0:
+            del self.sizes[label]
+            return
+        
+        seeds = self._free_neighbors(row, col)
+        if len(seeds) <= 1:
+            return
+        
+        # Grow one breadth-first search per former neighbour in lock step.
+        # Searches that meet are merged; a search that runs dry before the
+        # others is a piece cut off by the new obstacle. Work is bounded by
+        # the size of the pieces that split off, not the whole component.
+        owner = {seed: group for group, seed in enumerate(seeds)}
+        parents = list(range(len(seeds)))
+        frontiers = {group: deque([seed]) for group, seed in enumerate(seeds)}
+        members = {group: [seed] for group, seed in enumerate(seeds)}
+        
+        while len(frontiers) > 1:
+            for group in list(frontiers):
+                if group not in frontiers:
+                    continue
+                frontier = frontiers[group]
+                if not frontier:
+                    del frontiers[group]
+                    if not frontiers:
+                        break
+                    new_label = self._new_label()
+                    for r, c in members[group]:
+                        self.labels[r, c] = new_label
+                    self.sizes[new_label] = len(members[group])
+                    self.sizes[label] -= len(members[group])
+                    continue
+                
+                cell = frontier.popleft()
+                for neighbor in self._free_neighbors(*cell):
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = group
+                        members[group].append(neighbor)
+                        frontier.append(neighbor)
+                        continue
+                    other = _find(parents, other)
+                    if other != group:
+                        parents[other] = group
+                        frontier.extend(frontiers.pop(other))
+                        members[group].extend(members.pop(other))
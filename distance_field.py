@@ -0,0 +1,102 @@
+from collections import OrderedDict
+import numpy as np
+from typing import List, Tuple, Optional
+from occupancy_grid import OccupancyGrid
+from search_engines import bfs_distances
+
+NO_STEP = 0
+DIRECTION_NAMES = {1: "RIGHT", 2: "DOWN", 3: "LEFT", 4: "UP"}
+DIRECTION_OFFSETS = {1: (0, 1), 2: (1, 0), 3: (0, -1), 4: (-1, 0)}
+
+class DistanceField:
+    def __init__(self, grid: OccupancyGrid, goal: Tuple[int, int]):
+        self.goal = tuple(goal)
+        self.version = grid.version
+        self.distances = bfs_distances(grid.cells, self.goal)
+        self.next_step = self._build_next_step(self.distances)
+    
+    @staticmethod
+    def _build_next_step(distances: np.ndarray) -> np.ndarray:
+        # A cell steps towards any neighbour one closer to the goal. Codes
+        # are written in reverse priority so the final winner follows the
+        # engines' successor order: right, down, left, up.
+        rows, cols = distances.shape
+        padded = np.full((rows + 2, cols + 2), -1, dtype=np.int32)
+        padded[1:-1, 1:-1] = distances
+        wanted = distances - 1
+        reachable = distances > 0
+        next_step = np.zeros((rows, cols), dtype=np.uint8)
+        for code in (4, 3, 2, 1):
+            dr, dc = DIRECTION_OFFSETS[code]
+            neighbor = padded[1 + dr:rows + 1 + dr, 1 + dc:cols + 1 + dc]
+            next_step[reachable & (neighbor == wanted)] = code
+        return next_step
+    
+    @property
+    def nbytes(self) -> int:
+        return self.distances.nbytes + self.next_step.nbytes
+    
+    def distance(self, position: Tuple[int, int]) -> int:
+        return int(self.distances[position[0], position[1]])
+    
+    def path_from(self, start: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        row, col = start
+        if self.distances[row, col] < 0:
+            return None
+        path = [(row, col)]
+        next_step = self.next_step
+        while (row, col) != self.goal:
+            dr, dc = DIRECTION_OFFSETS[int(next_step[row, col])]
+            row += dr
+            col += dc
+            path.append((row, col))
+        return path
+    
+    def directions_from(self, start: Tuple[int, int]) -> Optional[List[str]]:
+        row, col = start
+        if self.distances[row, col] < 0:
+            return None
+        directions = []
+        next_step = self.next_step
+        while (row, col) != self.goal:
+            code = int(next_step[row, col])
+            directions.append(DIRECTION_NAMES[code])
+            dr, dc = DIRECTION_OFFSETS[code]
+            row += dr
+            col += dc
+        return directions
+
+class DistanceFieldCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._fields = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._fields)
+    
+    def get(self, grid: OccupancyGrid, goal: Tuple[int, int]) -> DistanceField:
+        goal = tuple(goal)
+        key = (goal, grid.version)
+        field = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            self.hits += 1
+            return field
+        
+        self.misses += 1
+        for stale_key in [k for k in self._fields if k[1] != grid.version]:
+            self.total_bytes -= self._fields.pop(stale_key).nbytes
+        field = DistanceField(grid, goal)
+        self._fields[key] = field
+        self.total_bytes += field.nbytes
+        while self.total_bytes > self.max_bytes and len(self._fields) > 1:
+            _, evicted = self._fields.popitem(last=False)
+            self.total_bytes -= evicted.nbytes
+        return field
+    
+    def clear(self):
+        self._fields.clear()
+        self.total_bytes = 0
@@ -0,0 +1,278 @@
+import tkinter as tk
+import numpy as np
+from typing import Dict, Iterable, Optional, Tuple
+from occupancy_grid import OccupancyGrid, OBSTACLE
+
+# Above this many cells one canvas item per cell is too heavy at any zoom.
+MAX_VECTOR_CELLS = 250_000
+
+class CanvasGridRenderer:
+    # One rectangle per cell is created when the layout (grid or cell size)
+    # changes. Afterwards only cells whose colour can have changed - edited
+    # cells, old/new start and end, and cells entering or leaving the path -
+    # are restyled with itemconfig.
+    def __init__(self, canvas, colors: Dict[str, str]):
+        self.canvas = canvas
+        self.colors = colors
+        self.grid = None
+        self.cell_size = None
+        self.items = []
+        self.styles = []
+        self.start = None
+        self.end = None
+        self.path = frozenset()
+        self.dirty = set()
+        self.rebuilds = 0
+        self.updates = 0
+    
+    def attach(self, grid: OccupancyGrid):
+        if grid is self.grid:
+            return
+        if self.grid is not None:
+            self.grid.remove_listener(self.on_cell_changed)
+        self.grid = grid
+        grid.add_listener(self.on_cell_changed)
+        self.cell_size = None
+    
+    def detach(self):
+        if self.grid is not None:
+            self.grid.remove_listener(self.on_cell_changed)
+        self.grid = None
+        self.cell_size = None
+        self.items = []
+        self.styles = []
+    
+    def on_cell_changed(self, row: int, col: int, old: int, new: int):
+        self.dirty.add(row * self.grid.cols + col)
+    
+    def _style(self, idx: int, cells) -> Tuple[str, int]:
+        position = divmod(idx, self.grid.cols)
+        if position == self.start:
+            return self.colors['start'], 1
+        if position == self.end:
+            return self.colors['end'], 1
+        if position in self.path:
+            return self.colors['path'], 1
+        if cells[position] == OBSTACLE:
+            return self.colors['obstacle'], 1
+        return self.colors['free'], 1
+    
+    def render(self, cell_size: int, start: Optional[Tuple[int, int]] = None,
+               end: Optional[Tuple[int, int]] = None,
+               path: Optional[Iterable[Tuple[int, int]]] = None):
+        path = frozenset(path) if path else frozenset()
+        if cell_size != self.cell_size or len(self.items) != self.grid.rows * self.grid.cols:
+            self.start, self.end, self.path = start, end, path
+            self._rebuild(cell_size)
+            return
+        
+        cols = self.grid.cols
+        changed = self.dirty
+        self.dirty = set()
+        for position in (self.start, self.end, start, end):
+            if position is not None:
+                changed.add(position[0] * cols + position[1])
+        changed.update(row * cols + col for row, col in self.path ^ path)
+        self.start, self.end, self.path = start, end, path
+        
+        cells = self.grid.cells
+        for idx in changed:
+            style = self._style(idx, cells)
+            if style != self.styles[idx]:
+                self._apply(idx, style)
+    
+    def _rebuild(self, cell_size: int):
+        self.canvas.delete("all")
+        self.cell_size = cell_size
+        rows, cols = self.grid.rows, self.grid.cols
+        self.canvas.configure(scrollregion=(0, 0, cols * cell_size, rows * cell_size))
+        
+        cells = self.grid.cells
+        outline = self.colors['grid_line']
+        create = self.canvas.create_rectangle
+        items = []
+        styles = []
+        for row in range(rows):
+            y1 = row * cell_size
+            y2 = y1 + cell_size
+            for col in range(cols):
+                style = self._style(row * cols + col, cells)
+                x1 = col * cell_size
+                items.append(create(x1, y1, x1 + cell_size, y2, fill=style[0], outline=outline, width=style[1]))
+                styles.append(style)
+        self.items = items
+        self.styles = styles
+        self.dirty.clear()
+        self.rebuilds += 1
+    
+    def _apply(self, idx: int, style: Tuple[str, int]):
+        fill, width = style
+        self.canvas.itemconfig(self.items[idx], fill=fill, width=width)
+        self.styles[idx] = style
+        self.updates += 1
+    
+    def highlight(self, position: Tuple[int, int], color: str, width: int = 2):
+        # Temporary styling (path animation); the cell is restored on the next
+        # render because it is marked dirty.
+        idx = position[0] * self.grid.cols + position[1]
+        if self.styles[idx] != (color, width):
+            self._apply(idx, (color, width))
+        self.dirty.add(idx)
+
+def _rgb(color: str) -> Tuple[int, int, int]:
+    color = color.lstrip('#')
+    return int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16)
+
+class ImageGridRenderer:
+    # Draws only the visible part of the grid as one PhotoImage, built from a
+    # per-cell colour lookup and scaled up to cell_size with np.repeat. The
+    # image is rebuilt when the viewport or zoom changes; single-cell edits
+    # are patched into it with put(). The path is the only vector overlay.
+    def __init__(self, canvas, colors: Dict[str, str]):
+        self.canvas = canvas
+        self.colors = colors
+        self.palette = np.array([_rgb(colors['free']), _rgb(colors['obstacle'])], dtype=np.uint8)
+        self.grid = None
+        self.cell_size = None
+        self.viewport = None
+        self.image = None
+        self.image_item = None
+        self.path_item = None
+        self.animated_item = None
+        self.animated = []
+        self.start = None
+        self.end = None
+        self.path = None
+        self.dirty = set()
+        self.rebuilds = 0
+        self.updates = 0
+    
+    def attach(self, grid: OccupancyGrid):
+        if grid is self.grid:
+            return
+        if self.grid is not None:
+            self.grid.remove_listener(self.on_cell_changed)
+        self.grid = grid
+        grid.add_listener(self.on_cell_changed)
+        self.cell_size = None
+    
+    def detach(self):
+        if self.grid is not None:
+            self.grid.remove_listener(self.on_cell_changed)
+        self.grid = None
+        self.cell_size = None
+        self.image = None
+    
+    def on_cell_changed(self, row: int, col: int, old: int, new: int):
+        self.dirty.add((row, col))
+    
+    def visible_cells(self, cell_size: int) -> Tuple[int, int, int, int]:
+        x0 = int(self.canvas.canvasx(0))
+        y0 = int(self.canvas.canvasy(0))
+        width = max(self.canvas.winfo_width(), 1)
+        height = max(self.canvas.winfo_height(), 1)
+        row0 = min(max(y0 // cell_size, 0), self.grid.rows)
+        col0 = min(max(x0 // cell_size, 0), self.grid.cols)
+        row1 = min((y0 + height) // cell_size + 1, self.grid.rows)
+        col1 = min((x0 + width) // cell_size + 1, self.grid.cols)
+        return row0, row1, col0, col1
+    
+    def _cell_color(self, position: Tuple[int, int]) -> str:
+        if position == self.start:
+            return self.colors['start']
+        if position == self.end:
+            return self.colors['end']
+        if self.grid.cells[position] == OBSTACLE:
+            return self.colors['obstacle']
+        return self.colors['free']
+    
+    def render(self, cell_size: int, start: Optional[Tuple[int, int]] = None,
+               end: Optional[Tuple[int, int]] = None,
+               path: Optional[Iterable[Tuple[int, int]]] = None):
+        path = list(path) if path else None
+        viewport = self.visible_cells(cell_size)
+        old_start, old_end = self.start, self.end
+        self.start, self.end = start, end
+        if cell_size != self.cell_size or viewport != self.viewport or self.image is None:
+            self.path = path
+            self._rebuild(cell_size, viewport)
+            return
+        
+        changed = self.dirty
+        self.dirty = set()
+        changed.update(position for position in (old_start, old_end, start, end) if position is not None)
+        row0, row1, col0, col1 = viewport
+        for row, col in changed:
+            if row0 <= row < row1 and col0 <= col < col1:
+                x = (col - col0) * cell_size
+                y = (row - row0) * cell_size
+                self.image.put(self._cell_color((row, col)), to=(x, y, x + cell_size, y + cell_size))
+                self.updates += 1
+        if path != self.path:
+            self.path = path
+            self._draw_path()
+    
+    def _rebuild(self, cell_size: int, viewport: Tuple[int, int, int, int]):
+        self.canvas.delete("all")
+        self.cell_size = cell_size
+        self.viewport = viewport
+        self.dirty.clear()
+        rows, cols = self.grid.rows, self.grid.cols
+        self.canvas.configure(scrollregion=(0, 0, cols * cell_size, rows * cell_size))
+        
+        row0, row1, col0, col1 = viewport
+        if row1 <= row0 or col1 <= col0:
+            self.image = None
+            self.image_item = None
+        else:
+            window = self.grid.cells[row0:row1, col0:col1]
+            colors = self.palette[(window == OBSTACLE).view(np.uint8)]
+            for position, key in ((self.start, 'start'), (self.end, 'end')):
+                if position is not None and row0 <= position[0] < row1 and col0 <= position[1] < col1:
+                    colors[position[0] - row0, position[1] - col0] = _rgb(self.colors[key])
+            pixels = np.repeat(np.repeat(colors, cell_size, axis=0), cell_size, axis=1)
+            if cell_size >= 4:
+                grid_line = _rgb(self.colors['grid_line'])
+                pixels[cell_size - 1::cell_size, :] = grid_line
+                pixels[:, cell_size - 1::cell_size] = grid_line
+            height, width = pixels.shape[:2]
+            header = f"P6 {width} {height} 255\n".encode('ascii')
+            self.image = tk.PhotoImage(data=header + pixels.tobytes(), format='PPM')
+            self.image_item = self.canvas.create_image(col0 * cell_size, row0 * cell_size,
+                                                       image=self.image, anchor=tk.NW)
+        self.path_item = None
+        self.animated_item = None
+        self._draw_path()
+        self.rebuilds += 1
+    
+    def _line_coords(self, positions):
+        half = self.cell_size / 2
+        coords = []
+        for row, col in positions:
+            coords.extend((col * self.cell_size + half, row * self.cell_size + half))
+        return coords
+    
+    def _draw_path(self):
+        if self.path_item is not None:
+            self.canvas.delete(self.path_item)
+            self.path_item = None
+        if self.animated_item is not None:
+            self.canvas.delete(self.animated_item)
+            self.animated_item = None
+        self.animated = []
+        if self.path and len(self.path) > 1:
+            self.path_item = self.canvas.create_line(*self._line_coords(self.path), fill=self.colors['path'],
+                                                     width=max(self.cell_size // 2, 1))
+    
+    def highlight(self, position: Tuple[int, int], color: str, width: int = 2):
+        # The animated part of the path is one polyline that grows as cells
+        # are highlighted.
+        self.animated.append(tuple(position))
+        coords = self._line_coords(self.animated)
+        if len(self.animated) == 1:
+            coords = coords * 2
+        line_width = max(self.cell_size // 2, width)
+        if self.animated_item is None:
+            self.animated_item = self.canvas.create_line(*coords, fill=color, width=line_width)
+        else:
+            self.canvas.coords(self.animated_item, *coords)
@@ -0,0 +1,284 @@
+import heapq
+from collections import deque
+import numpy as np
+from typing import Dict, List, Tuple, Optional
+from occupancy_grid import OccupancyGrid, OBSTACLE
+from search_engines import STEPS, SearchStats, SearchWorkspace, astar_array, reusable_workspace
+
+# Entrances shorter than this get one transition in the middle, longer ones
+# get a transition at each end (Botea et al., HPA*).
+MAX_SINGLE_TRANSITION = 6
+
+class HierarchicalMap:
+    def __init__(self, grid: OccupancyGrid, cluster_size: int = 16, build: bool = True):
+        if cluster_size < 2:
+            raise ValueError("cluster_size must be at least 2")
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.rows = grid.rows
+        self.cols = grid.cols
+        self.cluster_rows = -(-self.rows // cluster_size)
+        self.cluster_cols = -(-self.cols // cluster_size)
+        self.transitions: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self.inter_edges: Dict[int, set] = {}
+        self.intra_edges: Dict[int, Dict[int, Dict[int, int]]] = {}
+        self.dirty = set()
+        self._workspace = None
+        if build:
+            self.rebuild()
+        grid.add_listener(self.on_cell_changed)
+    
+    def detach(self):
+        self.grid.remove_listener(self.on_cell_changed)
+    
+    def cluster_of(self, row: int, col: int) -> int:
+        return (row // self.cluster_size) * self.cluster_cols + col // self.cluster_size
+    
+    def cluster_bounds(self, cluster: int) -> Tuple[int, int, int, int]:
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        row0 = cluster_row * self.cluster_size
+        col0 = cluster_col * self.cluster_size
+        return row0, min(row0 + self.cluster_size, self.rows), col0, min(col0 + self.cluster_size, self.cols)
+    
+    def _cluster_borders(self, cluster: int) -> List[Tuple[int, int]]:
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        borders = []
+        if cluster_col + 1 < self.cluster_cols:
+            borders.append((cluster, cluster + 1))
+        if cluster_col > 0:
+            borders.append((cluster - 1, cluster))
+        if cluster_row + 1 < self.cluster_rows:
+            borders.append((cluster, cluster + self.cluster_cols))
+        if cluster_row > 0:
+            borders.append((cluster - self.cluster_cols, cluster))
+        return borders
+    
+    def cluster_nodes(self, cluster: int) -> List[int]:
+        nodes = set()
+        for border in self._cluster_borders(cluster):
+            for cell_a, cell_b in self.transitions.get(border, ()):
+                nodes.add(cell_a if border[0] == cluster else cell_b)
+        return sorted(nodes)
+    
+    def _find_transitions(self, border: Tuple[int, int]) -> List[Tuple[int, int]]:
+        cells = self.grid.cells
+        cluster_a, cluster_b = border
+        row0, row1, col0, col1 = self.cluster_bounds(cluster_a)
+        # Clusters in the same cluster row share a vertical (left/right) border.
+        if cluster_a // self.cluster_cols == cluster_b // self.cluster_cols:
+            side_a = cells[row0:row1, col1 - 1]
+            side_b = cells[row0:row1, col1]
+            to_cells = lambda offset: ((row0 + offset) * self.cols + col1 - 1, (row0 + offset) * self.cols + col1)
+        else:
+            side_a = cells[row1 - 1, col0:col1]
+            side_b = cells[row1, col0:col1]
+            to_cells = lambda offset: ((row1 - 1) * self.cols + col0 + offset, row1 * self.cols + col0 + offset)
+        
+        open_span = np.concatenate(([False], (side_a != OBSTACLE) & (side_b != OBSTACLE), [False]))
+        edges = np.diff(open_span.astype(np.int8))
+        transitions = []
+        for start, end in zip(np.nonzero(edges == 1)[0].tolist(), np.nonzero(edges == -1)[0].tolist()):
+            if end - start < MAX_SINGLE_TRANSITION:
+                transitions.append(to_cells((start + end - 1) // 2))
+            else:
+                transitions.append(to_cells(start))
+                transitions.append(to_cells(end - 1))
+        return transitions
+    
+    def _cluster_distances(self, cluster: int, source: int) -> Dict[int, int]:
+        row0, row1, col0, col1 = self.cluster_bounds(cluster)
+        cells = self.grid.cells
+        distances = {source: 0}
+        frontier = deque([source])
+        while frontier:
+            idx = frontier.popleft()
+            row, col = divmod(idx, self.cols)
+            for dr, dc in STEPS:
+                n_row, n_col = row + dr, col + dc
+                if not (row0 <= n_row < row1 and col0 <= n_col < col1):
+                    continue
+                neighbor = n_row * self.cols + n_col
+                if neighbor in distances or cells[n_row, n_col] == OBSTACLE:
+                    continue
+                distances[neighbor] = distances[idx] + 1
+                frontier.append(neighbor)
+        return distances
+    
+    def _build_cluster_edges(self, cluster: int):
+        nodes = self.cluster_nodes(cluster)
+        edges = {}
+        for node in nodes:
+            distances = self._cluster_distances(cluster, node)
+            edges[node] = {other: distances[other] for other in nodes
+                           if other != node and other in distances}
+        self.intra_edges[cluster] = edges
+    
+    def _rebuild_inter_edges(self):
+        inter = {}
+        for transitions in self.transitions.values():
+            for cell_a, cell_b in transitions:
+                inter.setdefault(cell_a, set()).add(cell_b)
+                inter.setdefault(cell_b, set()).add(cell_a)
+        self.inter_edges = inter
+    
+    def rebuild(self):
+        self.transitions = {}
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            for border in self._cluster_borders(cluster):
+                if border[0] == cluster:
+                    self.transitions[border] = self._find_transitions(border)
+        self._rebuild_inter_edges()
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            self._build_cluster_edges(cluster)
+        self.dirty.clear()
+    
+    def on_cell_changed(self, row: int, col: int, old: int, new: int):
+        if (old == OBSTACLE) != (new == OBSTACLE):
+            self.dirty.add(self.cluster_of(row, col))
+    
+    def refresh(self):
+        # A changed cell can move entrances on any border of its cluster,
+        # which changes the abstract nodes of the clusters across those
+        # borders as well; everything else is left untouched.
+        if not self.dirty:
+            return
+        affected = set()
+        for cluster in self.dirty:
+            for border in self._cluster_borders(cluster):
+                self.transitions[border] = self._find_transitions(border)
+                affected.update(border)
+        self._rebuild_inter_edges()
+        for cluster in affected:
+            self._build_cluster_edges(cluster)
+        self.dirty.clear()
+    
+    def save(self, filename: str):
+        self.refresh()
+        transitions = [(a, b, cell_a, cell_b) for (a, b), pairs in self.transitions.items()
+                       for cell_a, cell_b in pairs]
+        edges = [(cluster, src, dst, cost) for cluster, nodes in self.intra_edges.items()
+                 for src, targets in nodes.items() for dst, cost in targets.items()]
+        np.savez_compressed(
+            filename,
+            meta=np.array([self.rows, self.cols, self.cluster_size], dtype=np.int64),
+            digest=np.array(self.grid.digest()),
+            transitions=np.array(transitions, dtype=np.int64).reshape(-1, 4),
+            edges=np.array(edges, dtype=np.int64).reshape(-1, 4),
+        )
+    
+    @classmethod
+    def load(cls, filename: str, grid: OccupancyGrid) -> 'HierarchicalMap':
+        with np.load(filename) as data:
+            rows, cols, cluster_size = (int(value) for value in data['meta'])
+            if (rows, cols) != grid.shape or str(data['digest']) != grid.digest():
+                raise ValueError(f"Abstraction in {filename} does not match the grid")
+            transitions = data['transitions'].tolist()
+            edges = data['edges'].tolist()
+        
+        hierarchy = cls(grid, cluster_size, build=False)
+        cluster_count = hierarchy.cluster_rows * hierarchy.cluster_cols
+        for cluster in range(cluster_count):
+            for border in hierarchy._cluster_borders(cluster):
+                hierarchy.transitions.setdefault(border, [])
+        for a, b, cell_a, cell_b in transitions:
+            hierarchy.transitions[(a, b)].append((cell_a, cell_b))
+        hierarchy._rebuild_inter_edges()
+        for cluster in range(cluster_count):
+            hierarchy.intra_edges[cluster] = {node: {} for node in hierarchy.cluster_nodes(cluster)}
+        for cluster, src, dst, cost in edges:
+            hierarchy.intra_edges[cluster][src][dst] = cost
+        return hierarchy
+    
+    def _local_path(self, cluster: int, start: int, end: int) -> Optional[List[Tuple[int, int]]]:
+        row0, row1, col0, col1 = self.cluster_bounds(cluster)
+        start_row, start_col = divmod(start, self.cols)
+        end_row, end_col = divmod(end, self.cols)
+        path = astar_array(self.grid.cells[row0:row1, col0:col1],
+                           (start_row - row0, start_col - col0), (end_row - row0, end_col - col0))
+        if path is None:
+            return None
+        return [(row + row0, col + col0) for row, col in path]
+    
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  stats: Optional[SearchStats] = None,
+                  workspace: Optional[SearchWorkspace] = None) -> Optional[List[Tuple[int, int]]]:
+        self.refresh()
+        cells = self.grid.cells
+        if cells[start] == OBSTACLE or cells[end] == OBSTACLE:
+            return None
+        
+        start_cluster = self.cluster_of(*start)
+        end_cluster = self.cluster_of(*end)
+        # Short hops are cheaper to answer exactly on the full grid than to
+        # route through the abstract graph.
+        if (start_cluster == end_cluster or
+                abs(start[0] - end[0]) + abs(start[1] - end[1]) <= 2 * self.cluster_size):
+            if workspace is None:
+                self._workspace = workspace = reusable_workspace(self._workspace, self.rows, self.cols)
+            return astar_array(cells, start, end, workspace, stats, masks=self.grid.neighbor_masks())
+        
+        start_idx = start[0] * self.cols + start[1]
+        end_idx = end[0] * self.cols + end[1]
+        start_links = self._cluster_distances(start_cluster, start_idx)
+        end_links = self._cluster_distances(end_cluster, end_idx)
+        start_edges = {node: start_links[node] for node in self.cluster_nodes(start_cluster) if node in start_links}
+        goal_edges = {node: end_links[node] for node in self.cluster_nodes(end_cluster) if node in end_links}
+        
+        end_row, end_col = end
+        def heuristic(idx):
+            row, col = divmod(idx, self.cols)
+            return abs(row - end_row) + abs(col - end_col)
+        
+        g_cost = {start_idx: 0}
+        came_from = {}
+        closed = set()
+        open_list = [(heuristic(start_idx), heuristic(start_idx), start_idx)]
+        expanded = 0
+        while open_list:
+            _, _, node = heapq.heappop(open_list)
+            if node == end_idx:
+                break
+            if node in closed:
+                continue
+            closed.add(node)
+            expanded += 1
+            
+            cluster = self.cluster_of(*divmod(node, self.cols))
+            successors = list(self.intra_edges[cluster].get(node, {}).items())
+            successors.extend((partner, 1) for partner in self.inter_edges.get(node, ()))
+            if node == start_idx:
+                successors.extend(start_edges.items())
+            if node in goal_edges:
+                successors.append((end_idx, goal_edges[node]))
+            
+            for neighbor, cost in successors:
+                if neighbor in closed:
+                    continue
+                tentative_g = g_cost[node] + cost
+                if tentative_g < g_cost.get(neighbor, float('inf')):
+                    g_cost[neighbor] = tentative_g
+                    came_from[neighbor] = node
+                    h = heuristic(neighbor)
+                    heapq.heappush(open_list, (tentative_g + h, h, neighbor))
+        
+        if stats is not None:
+            stats.nodes_expanded += expanded
+        if end_idx not in came_from:
+            return None
+        
+        abstract_path = [end_idx]
+        while abstract_path[-1] != start_idx:
+            abstract_path.append(came_from[abstract_path[-1]])
+        abstract_path.reverse()
+        
+        path = [start]
+        for a, b in zip(abstract_path, abstract_path[1:]):
+            cluster_a = self.cluster_of(*divmod(a, self.cols))
+            if cluster_a != self.cluster_of(*divmod(b, self.cols)):
+                path.append(divmod(b, self.cols))
+                continue
+            segment = self._local_path(cluster_a, a, b)
+            if segment is None:
+                return None
+            path.extend(segment[1:])
+        return path
@@ -0,0 +1,147 @@
+import heapq
+from typing import List, Tuple, Optional
+from occupancy_grid import OccupancyGrid, OBSTACLE
+from search_engines import STEPS, SearchStats
+
+INF = float('inf')
+
+class DStarLite:
+    def __init__(self, grid: OccupancyGrid, start: Tuple[int, int], goal: Tuple[int, int]):
+        self.grid = grid
+        self.start = tuple(start)
+        self.goal = tuple(goal)
+        self.rows = grid.rows
+        self.cols = grid.cols
+        size = self.rows * self.cols
+        self.g = [INF] * size
+        self.rhs = [INF] * size
+        self.km = 0
+        self.open_list = []
+        self.open_keys = {}
+        self.pending = set()
+        self._last_start = self.start
+        
+        goal_idx = self._index(self.goal)
+        self.rhs[goal_idx] = 0
+        self._push(goal_idx)
+        grid.add_listener(self.on_cell_changed)
+    
+    def detach(self):
+        self.grid.remove_listener(self.on_cell_changed)
+    
+    def _index(self, position: Tuple[int, int]) -> int:
+        return position[0] * self.cols + position[1]
+    
+    def _heuristic(self, idx: int) -> int:
+        row, col = divmod(idx, self.cols)
+        return abs(row - self.start[0]) + abs(col - self.start[1])
+    
+    def _key(self, idx: int) -> Tuple[float, float]:
+        best = min(self.g[idx], self.rhs[idx])
+        return (best + self._heuristic(idx) + self.km, best)
+    
+    def _push(self, idx: int):
+        key = self._key(idx)
+        self.open_keys[idx] = key
+        heapq.heappush(self.open_list, (key, idx))
+    
+    def _top_key(self) -> Tuple[float, float]:
+        # Entries are invalidated lazily: an entry is live only while its key
+        # matches the one recorded in open_keys.
+        while self.open_list:
+            key, idx = self.open_list[0]
+            if self.open_keys.get(idx) == key:
+                return key
+            heapq.heappop(self.open_list)
+        return (INF, INF)
+    
+    def _neighbors(self, idx: int) -> List[int]:
+        row, col = divmod(idx, self.cols)
+        cells = self.grid.cells
+        neighbors = []
+        for dr, dc in STEPS:
+            n_row, n_col = row + dr, col + dc
+            if 0 <= n_row < self.rows and 0 <= n_col < self.cols and cells[n_row, n_col] != OBSTACLE:
+                neighbors.append(n_row * self.cols + n_col)
+        return neighbors
+    
+    def _is_blocked(self, idx: int) -> bool:
+        return self.grid.cells[divmod(idx, self.cols)] == OBSTACLE
+    
+    def _update_vertex(self, idx: int):
+        if idx != self._index(self.goal):
+            if self._is_blocked(idx):
+                self.rhs[idx] = INF
+            else:
+                g = self.g
+                self.rhs[idx] = min((g[n] + 1 for n in self._neighbors(idx)), default=INF)
+        self.open_keys.pop(idx, None)
+        if self.g[idx] != self.rhs[idx]:
+            self._push(idx)
+    
+    def on_cell_changed(self, row: int, col: int, old: int, new: int):
+        if (old == OBSTACLE) != (new == OBSTACLE):
+            self.pending.add(row * self.cols + col)
+    
+    def move_start(self, start: Tuple[int, int]):
+        start = tuple(start)
+        self.km += abs(start[0] - self._last_start[0]) + abs(start[1] - self._last_start[1])
+        self._last_start = start
+        self.start = start
+    
+    def _apply_pending(self):
+        changed = self.pending
+        self.pending = set()
+        for idx in changed:
+            self._update_vertex(idx)
+            row, col = divmod(idx, self.cols)
+            for dr, dc in STEPS:
+                n_row, n_col = row + dr, col + dc
+                if 0 <= n_row < self.rows and 0 <= n_col < self.cols:
+                    self._update_vertex(n_row * self.cols + n_col)
+    
+    def _compute_shortest_path(self, stats: Optional[SearchStats]):
+        start_idx = self._index(self.start)
+        g = self.g
+        rhs = self.rhs
+        while self._top_key() < self._key(start_idx) or rhs[start_idx] != g[start_idx]:
+            key_old, idx = heapq.heappop(self.open_list)
+            if self.open_keys.get(idx) != key_old:
+                continue
+            key_new = self._key(idx)
+            if key_old < key_new:
+                self._push(idx)
+                continue
+            del self.open_keys[idx]
+            if stats is not None:
+                stats.nodes_expanded += 1
+            if g[idx] > rhs[idx]:
+                g[idx] = rhs[idx]
+                for neighbor in self._neighbors(idx):
+                    self._update_vertex(neighbor)
+            else:
+                g[idx] = INF
+                self._update_vertex(idx)
+                for neighbor in self._neighbors(idx):
+                    self._update_vertex(neighbor)
+    
+    def compute_path(self, stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int]]]:
+        if stats is not None:
+            stats.engine = 'dstar_lite'
+        if self.grid.is_blocked(*self.start) or self.grid.is_blocked(*self.goal):
+            self._apply_pending()
+            return None
+        self._apply_pending()
+        self._compute_shortest_path(stats)
+        
+        idx = self._index(self.start)
+        if self.g[idx] == INF:
+            return None
+        goal_idx = self._index(self.goal)
+        path = [self.start]
+        for _ in range(self.rows * self.cols):
+            if idx == goal_idx:
+                return path
+            idx = min(self._neighbors(idx), key=lambda n: self.g[n])
+            path.append(divmod(idx, self.cols))
+        return None
@@ -1,13 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import csv
 import time
 import threading
 from pathfinding_car import CarPathfinder
+from anytime_planner import AnytimeResult, CancelToken
+from compact_path import CompactPath
+from map_format import save_map
+from occupancy_grid import GridHistory
+from grid_renderer import CanvasGridRenderer, ImageGridRenderer, MAX_VECTOR_CELLS
 from typing import List, Tuple, Optional
 
 class InteractivePathfinder:
-    def __init__(self, grid_file: str = 'floor2.csv'):
+    def __init__(self, grid_file: str = 'floor2.csv', image_zoom_threshold: float = 0.75):
         self.root = tk.Tk()
         self.root.title("🚗 Interactive Car Pathfinder - Enhanced")
         self.root.geometry("1400x900")
@@ -19,8 +23,9 @@ class InteractivePathfinder:
         
         self.pathfinder = CarPathfinder(grid_file)
         self.grid = self.pathfinder.grid
-        self.rows = len(self.grid)
-        self.cols = len(self.grid[0])
+        self.history = GridHistory(self.grid)
+        self.rows = self.grid.rows
+        self.cols = self.grid.cols
         
         self.start_pos = None
         self.end_pos = None
@@ -30,6 +35,7 @@ class InteractivePathfinder:
         self.last_pos = None
         
         self.zoom_level = 1.0
+        self.image_zoom_threshold = image_zoom_threshold
         self.base_cell_size = min(500 // self.rows, 500 // self.cols)
         self.base_cell_size = max(self.base_cell_size, 8)
         self.cell_size = int(self.base_cell_size * self.zoom_level)
@@ -37,6 +43,14 @@ class InteractivePathfinder:
         self.animation_speed = 50
         self.path_animation_running = False
         
+        # Searches run in a worker thread under a cancel token; edits cancel
+        # the running search and restart it once the user pauses.
+        self.search_token = None
+        self.search_generation = 0
+        self.search_time_limit = 5.0
+        self.replan_job = None
+        self.replan_delay = 150
+        
         self.stats = {
             'paths_found': 0,
             'total_steps': 0,
@@ -69,6 +83,8 @@ class InteractivePathfinder:
         self.root.bind('<Key-3>', lambda e: self.set_mode('end'))
         self.root.bind('<Control-f>', lambda e: self.find_path())
         self.root.bind('<Control-r>', lambda e: self.reset_grid())
+        self.root.bind('<Control-z>', lambda e: self.undo_edit())
+        self.root.bind('<Control-y>', lambda e: self.redo_edit())
         self.root.bind('<Control-s>', lambda e: self.save_grid())
         self.root.bind('<Control-o>', lambda e: self.load_grid())
         self.root.bind('<plus>', lambda e: self.zoom_in())
@@ -134,6 +150,11 @@ class InteractivePathfinder:
         ttk.Button(action_frame, text="🔄 Reset Grid", 
                   command=self.reset_grid, **button_config).pack(pady=2, fill=tk.X)
         
+        history_controls = ttk.Frame(action_frame)
+        history_controls.pack(pady=2, fill=tk.X)
+        ttk.Button(history_controls, text="↶ Undo", command=self.undo_edit, width=6).pack(side=tk.LEFT, padx=(0, 2))
+        ttk.Button(history_controls, text="↷ Redo", command=self.redo_edit, width=6).pack(side=tk.LEFT)
+        
         file_frame = ttk.Frame(control_frame)
         file_frame.pack(side=tk.LEFT, padx=(0, 20))
         
@@ -186,12 +207,15 @@ class InteractivePathfinder:
         
         self.canvas = tk.Canvas(canvas_container, bg=self.colors['free'], 
                                highlightthickness=1, highlightbackground='#bdc3c7')
+        self.cell_renderer = CanvasGridRenderer(self.canvas, self.colors)
+        self.image_renderer = ImageGridRenderer(self.canvas, self.colors)
+        self.renderer = self.cell_renderer
         
-        scrollbar_v = ttk.Scrollbar(canvas_container, orient=tk.VERTICAL, command=self.canvas.yview)
+        scrollbar_v = ttk.Scrollbar(canvas_container, orient=tk.VERTICAL, command=self.on_scroll_y)
         scrollbar_v.pack(side=tk.RIGHT, fill=tk.Y)
         self.canvas.configure(yscrollcommand=scrollbar_v.set)
         
-        scrollbar_h = ttk.Scrollbar(left_panel, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        scrollbar_h = ttk.Scrollbar(left_panel, orient=tk.HORIZONTAL, command=self.on_scroll_x)
         scrollbar_h.pack(side=tk.BOTTOM, fill=tk.X)
         self.canvas.configure(xscrollcommand=scrollbar_h.set)
         
@@ -202,6 +226,7 @@ class InteractivePathfinder:
         self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
         self.canvas.bind("<Motion>", self.on_mouse_move)
         self.canvas.bind("<Leave>", self.on_mouse_leave)
+        self.canvas.bind("<Configure>", lambda e: self.draw_grid())
         
         right_panel = ttk.Frame(content_frame)
         right_panel.pack(side=tk.RIGHT, fill=tk.Y)
@@ -256,6 +281,7 @@ class InteractivePathfinder:
             "1/2/3: Change mode",
             "Ctrl+F: Find path",
             "Ctrl+R: Reset grid", 
+            "Ctrl+Z/Ctrl+Y: Undo/redo edits",
             "+/-: Zoom in/out"
         ]
         
@@ -301,9 +327,21 @@ class InteractivePathfinder:
         }
         self.info_label.config(text=mode_text.get(self.mode, ""))
         
+    def on_scroll_x(self, *args):
+        self.canvas.xview(*args)
+        self.draw_grid()
+        
+    def on_scroll_y(self, *args):
+        self.canvas.yview(*args)
+        self.draw_grid()
+        
+    def event_cell(self, event) -> Tuple[int, int]:
+        col = int(self.canvas.canvasx(event.x)) // self.cell_size
+        row = int(self.canvas.canvasy(event.y)) // self.cell_size
+        return row, col
+        
     def on_mouse_move(self, event):
-        col = event.x // self.cell_size
-        row = event.y // self.cell_size
+        row, col = self.event_cell(event)
         if 0 <= row < self.rows and 0 <= col < self.cols:
             self.coords_label.config(text=f"Position: ({row}, {col})")
         
@@ -312,6 +350,8 @@ class InteractivePathfinder:
         
     def on_canvas_click(self, event):
         self.is_dragging = True
+        if self.mode == "obstacle":
+            self.history.begin_action()
         self.handle_canvas_interaction(event)
         
     def on_canvas_drag(self, event):
@@ -321,31 +361,36 @@ class InteractivePathfinder:
     def on_canvas_release(self, event):
         self.is_dragging = False
         self.last_pos = None
+        self.history.end_action()
         
     def handle_canvas_interaction(self, event):
-        col = event.x // self.cell_size
-        row = event.y // self.cell_size
+        row, col = self.event_cell(event)
         
         if not (0 <= row < self.rows and 0 <= col < self.cols):
             return
             
         if self.mode == "obstacle":
-            if self.last_pos != (row, col):
-                self.grid[row][col] = 1 - self.grid[row][col]
-                self.pathfinder.grid = self.grid
-                self.stats['obstacles_modified'] += 1
-                self.update_stats_display()
-                self.last_pos = (row, col)
+            if self.last_pos == (row, col):
+                return
+            self.grid.toggle(row, col)
+            self.stats['obstacles_modified'] += 1
+            self.update_stats_display()
+            self.last_pos = (row, col)
+            
+            if self.start_pos and self.end_pos and (self.current_path or self.search_pending()):
+                self.schedule_replan()
+                self.draw_grid()
+                return
                 
         elif self.mode == "start":
-            if self.grid[row][col] == 1:
+            if self.grid.is_blocked(row, col):
                 messagebox.showwarning("Invalid Position", "Cannot set start on obstacle!")
                 return
             self.start_pos = (row, col)
             self.update_status("Start position set", 'green')
             
         elif self.mode == "end":
-            if self.grid[row][col] == 1:
+            if self.grid.is_blocked(row, col):
                 messagebox.showwarning("Invalid Position", "Cannot set end on obstacle!")
                 return
             self.end_pos = (row, col)
@@ -354,35 +399,102 @@ class InteractivePathfinder:
         self.clear_path()
         self.draw_grid()
         
+    def search_pending(self) -> bool:
+        return self.search_token is not None or self.replan_job is not None
+        
+    def cancel_search(self):
+        if self.replan_job is not None:
+            self.root.after_cancel(self.replan_job)
+            self.replan_job = None
+        if self.search_token is not None:
+            self.search_token.cancel()
+            self.search_token = None
+        self.search_generation += 1
+        
+    def schedule_replan(self):
+        # Debounced: a drag across many cells restarts the search once, after
+        # the last edit, instead of once per cell.
+        self.cancel_search()
+        self.replan_job = self.root.after(self.replan_delay, self.run_replan)
+        
+    def run_replan(self):
+        self.replan_job = None
+        if self.start_pos and self.end_pos:
+            self.start_search(animate=False)
+        
+    def start_search(self, animate: bool = True):
+        self.cancel_search()
+        generation = self.search_generation
+        token = CancelToken(self.search_time_limit)
+        self.search_token = token
+        start, end = self.start_pos, self.end_pos
+        
+        self.find_path_btn.config(state='disabled', text="🔄 Finding...")
+        self.update_status("Calculating path...", 'orange')
+        
+        # Reachability is checked here, on the thread that edits the grid, so
+        # the component labels match the snapshot the worker will search.
+        if not self.pathfinder.components.connected(start, end):
+            self.handle_search_finished(generation, AnytimeResult(complete=True), animate)
+            return
+        # The worker searches a snapshot, so edits made while it runs never
+        # change the cells under it.
+        snapshot = self.history.snapshot()
+        
+        def on_improve(result):
+            path, epsilon = list(result.path), result.epsilon
+            self.root.after(0, lambda: self.handle_path_improvement(generation, path, epsilon))
+            
+        def pathfind_thread():
+            result = self.pathfinder.anytime_pathfind(start, end, token, on_improve, grid=snapshot)
+            
+            self.root.after(0, lambda: self.handle_search_finished(generation, result, animate))
+            
+        threading.Thread(target=pathfind_thread, daemon=True).start()
+        
+    def handle_path_improvement(self, generation, path, epsilon):
+        if generation != self.search_generation:
+            return
+        self.path_animation_running = False
+        self.current_path = path
+        self.draw_grid()
+        self.status_label.config(text=f"Improving... {len(path)} steps (≤{epsilon:.2f}x optimal)",
+                                 foreground='orange')
+        
+    def handle_search_finished(self, generation, result, animate):
+        if generation != self.search_generation:
+            return
+        self.search_token = None
+        if animate:
+            self.handle_path_result(result.path)
+        else:
+            self.handle_reroute_result(result.path)
+        if result.path and not result.optimal:
+            self.update_status(f"Time limit: {len(result.path)} steps (≤{result.epsilon:.2f}x optimal)", 'orange')
+        
+    def handle_reroute_result(self, path):
+        self.find_path_btn.config(state='normal', text="🔍 Find Path")
+        if not path:
+            self.clear_path()
+            self.update_status("Route blocked - no path", 'red')
+            return
+        
+        self.path_animation_running = False
+        self.current_path = path
+        self.show_directions(path)
+        self.draw_grid()
+        self.update_status(f"Re-routed: {len(path)} steps", 'green')
+        
+    def use_image_rendering(self) -> bool:
+        return self.zoom_level < self.image_zoom_threshold or self.rows * self.cols > MAX_VECTOR_CELLS
+        
     def draw_grid(self):
-        self.canvas.delete("all")
-        
-        canvas_width = self.cols * self.cell_size
-        canvas_height = self.rows * self.cell_size
-        self.canvas.configure(scrollregion=(0, 0, canvas_width, canvas_height))
-        
-        for row in range(self.rows):
-            for col in range(self.cols):
-                x1 = col * self.cell_size
-                y1 = row * self.cell_size
-                x2 = x1 + self.cell_size
-                y2 = y1 + self.cell_size
-                
-                color = self.colors['free']
-                if self.grid[row][col] == 1:
-                    color = self.colors['obstacle']
-                
-                if self.current_path and (row, col) in self.current_path:
-                    if (row, col) != self.start_pos and (row, col) != self.end_pos:
-                        color = self.colors['path']
-                
-                if self.start_pos == (row, col):
-                    color = self.colors['start']
-                elif self.end_pos == (row, col):
-                    color = self.colors['end']
-                
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, 
-                                           outline=self.colors['grid_line'], width=1)
+        renderer = self.image_renderer if self.use_image_rendering() else self.cell_renderer
+        if renderer is not self.renderer:
+            self.renderer.detach()
+            self.renderer = renderer
+        self.renderer.attach(self.grid)
+        self.renderer.render(self.cell_size, self.start_pos, self.end_pos, self.current_path)
         
     def find_path_animated(self):
         if self.path_animation_running:
@@ -395,16 +507,7 @@ class InteractivePathfinder:
             messagebox.showwarning("Missing End", "Please set an end position first!")
             return
             
-        self.find_path_btn.config(state='disabled', text="🔄 Finding...")
-        self.update_status("Calculating path...", 'orange')
-        
-        def pathfind_thread():
-            self.pathfinder.grid = self.grid
-            path = self.pathfinder.astar_pathfind(self.start_pos, self.end_pos)
-            
-            self.root.after(0, lambda: self.handle_path_result(path))
-            
-        threading.Thread(target=pathfind_thread, daemon=True).start()
+        self.start_search(animate=True)
         
     def handle_path_result(self, path):
         self.find_path_btn.config(state='normal', text="🔍 Find Path")
@@ -415,35 +518,7 @@ class InteractivePathfinder:
             self.stats['total_steps'] += len(path)
             self.update_stats_display()
             
-            directions = self.pathfinder.get_directions(path)
-            
-            self.directions_text.config(state=tk.NORMAL)
-            self.directions_text.delete(1.0, tk.END)
-            
-            header = f"🎯 PATH FOUND!\n{'='*25}\n"
-            self.directions_text.insert(tk.END, header)
-            self.directions_text.insert(tk.END, f"📏 Length: {len(path)} steps\n")
-            self.directions_text.insert(tk.END, f"⏱️ From: {self.start_pos}\n")
-            self.directions_text.insert(tk.END, f"🏁 To: {self.end_pos}\n\n")
-            
-            self.directions_text.insert(tk.END, "🧭 NAVIGATION:\n")
-            self.directions_text.insert(tk.END, "-" * 20 + "\n")
-            
-            direction_icons = {
-                "UP": "⬆️", "DOWN": "⬇️", 
-                "LEFT": "⬅️", "RIGHT": "➡️"
-            }
-            
-            for i, direction in enumerate(directions, 1):
-                icon = direction_icons.get(direction, "❓")
-                self.directions_text.insert(tk.END, f"{i:2d}. {icon} {direction}\n")
-                
-            self.directions_text.insert(tk.END, f"\n📍 COORDINATES:\n")
-            self.directions_text.insert(tk.END, "-" * 15 + "\n")
-            for i, pos in enumerate(path):
-                self.directions_text.insert(tk.END, f"{i:2d}. {pos}\n")
-                
-            self.directions_text.config(state=tk.DISABLED)
+            self.show_directions(path)
             
             self.animate_path(path)
             self.update_status(f"Path found! {len(path)} steps", 'green')
@@ -451,26 +526,49 @@ class InteractivePathfinder:
             messagebox.showerror("No Path", "❌ No path found! The destination is unreachable.")
             self.update_status("No path found", 'red')
             
+    def show_directions(self, path):
+        # One line per straight run and per corner, inserted as a single block:
+        # the text grows with the number of turns, not the path length.
+        path = CompactPath.from_cells(path)
+        
+        self.directions_text.config(state=tk.NORMAL)
+        self.directions_text.delete(1.0, tk.END)
+        
+        direction_icons = {
+            "UP": "⬆️", "DOWN": "⬇️", 
+            "LEFT": "⬅️", "RIGHT": "➡️"
+        }
+        
+        lines = [f"🎯 PATH FOUND!\n{'='*25}",
+                 f"📏 Length: {len(path)} steps",
+                 f"⏱️ From: {self.start_pos}",
+                 f"🏁 To: {self.end_pos}\n",
+                 "🧭 NAVIGATION:",
+                 "-" * 20]
+        for i, instruction in enumerate(path.instructions(), 1):
+            icon = direction_icons.get(instruction.split()[0], "❓")
+            lines.append(f"{i:2d}. {icon} {instruction}")
+            
+        lines.append(f"\n📍 WAYPOINTS:")
+        lines.append("-" * 15)
+        for i, pos in enumerate(path.waypoints()):
+            lines.append(f"{i:2d}. {pos}")
+            
+        self.directions_text.insert(tk.END, "\n".join(lines) + "\n")
+        self.directions_text.config(state=tk.DISABLED)
+            
     def animate_path(self, path):
         self.path_animation_running = True
         self.draw_grid()
         
         def animate_step(step):
-            if step >= len(path):
+            if step >= len(path) or not self.path_animation_running:
                 self.path_animation_running = False
                 return
                 
             pos = path[step]
             if pos != self.start_pos and pos != self.end_pos:
-                row, col = pos
-                x1 = col * self.cell_size
-                y1 = row * self.cell_size
-                x2 = x1 + self.cell_size
-                y2 = y1 + self.cell_size
-                
-                self.canvas.create_rectangle(x1, y1, x2, y2, 
-                                           fill=self.colors['path_animated'], 
-                                           outline=self.colors['grid_line'], width=2)
+                self.renderer.highlight(pos, self.colors['path_animated'])
                 
             self.root.after(self.animation_speed, lambda: animate_step(step + 1))
             
@@ -480,6 +578,9 @@ class InteractivePathfinder:
         self.find_path_animated()
         
     def clear_path(self):
+        if self.search_pending():
+            self.cancel_search()
+            self.find_path_btn.config(state='normal', text="🔍 Find Path")
         self.current_path = None
         self.path_animation_running = False
         self.directions_text.config(state=tk.NORMAL)
@@ -489,27 +590,48 @@ class InteractivePathfinder:
         self.update_status("Path cleared", 'blue')
         
     def reset_grid(self):
-        try:
-            self.pathfinder = CarPathfinder('floor2.csv')
-            self.grid = self.pathfinder.grid
-            self.start_pos = None
-            self.end_pos = None
+        # Reverts only the edited cells back to the map as loaded; the file is
+        # not read again. The reset itself can be undone.
+        self.history.reset()
+        self.start_pos = None
+        self.end_pos = None
+        self.clear_path()
+        self.update_status("Grid reset", 'blue')
+        
+    def undo_edit(self):
+        if self.history.undo():
+            self.handle_history_edit("Edit undone")
+        else:
+            self.update_status("Nothing to undo", 'blue')
+        
+    def redo_edit(self):
+        if self.history.redo():
+            self.handle_history_edit("Edit redone")
+        else:
+            self.update_status("Nothing to redo", 'blue')
+        
+    def handle_history_edit(self, message):
+        if self.start_pos and self.end_pos and (self.current_path or self.search_pending()):
+            self.schedule_replan()
+            self.draw_grid()
+        else:
             self.clear_path()
-            self.update_status("Grid reset", 'blue')
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to reset grid: {str(e)}")
+        self.update_status(message, 'blue')
         
     def load_grid(self):
         filename = filedialog.askopenfilename(
             title="Load Grid File", 
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=[("Map files", "*.csv *.grid"), ("CSV files", "*.csv"),
+                       ("Binary maps", "*.grid"), ("All files", "*.*")]
         )
         if filename:
             try:
                 self.pathfinder = CarPathfinder(filename)
                 self.grid = self.pathfinder.grid
-                self.rows = len(self.grid)
-                self.cols = len(self.grid[0])
+                self.history.detach()
+                self.history = GridHistory(self.grid)
+                self.rows = self.grid.rows
+                self.cols = self.grid.cols
                 self.start_pos = None
                 self.end_pos = None
                 self.clear_path()
@@ -522,14 +644,11 @@ class InteractivePathfinder:
         filename = filedialog.asksaveasfilename(
             title="Save Grid File",
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=[("CSV files", "*.csv"), ("Binary maps", "*.grid"), ("All files", "*.*")]
         )
         if filename:
             try:
-                with open(filename, 'w', newline='') as file:
-                    writer = csv.writer(file)
-                    for row in self.grid:
-                        writer.writerow(row)
+                save_map(self.grid, filename)
                 self.update_status("Grid saved successfully", 'green')
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save grid: {str(e)}")
@@ -553,16 +672,16 @@ class InteractivePathfinder:
                     file.write(f"End Position: {self.end_pos}\n")
                     file.write(f"Path Length: {len(self.current_path)} steps\n\n")
                     
-                    directions = self.pathfinder.get_directions(self.current_path)
+                    path = CompactPath.from_cells(self.current_path)
                     file.write("Navigation Instructions:\n")
                     file.write("-" * 25 + "\n")
-                    for i, direction in enumerate(directions, 1):
-                        file.write(f"Step {i}: {direction}\n")
+                    for i, instruction in enumerate(path.instructions(), 1):
+                        file.write(f"Step {i}: {instruction}\n")
                         
-                    file.write(f"\nPath Coordinates:\n")
+                    file.write(f"\nWaypoints:\n")
                     file.write("-" * 20 + "\n")
-                    for i, pos in enumerate(self.current_path):
-                        file.write(f"Step {i}: {pos}\n")
+                    for i, pos in enumerate(path.waypoints()):
+                        file.write(f"Waypoint {i}: {pos}\n")
                         
                 self.update_status("Path exported successfully", 'green')
             except Exception as e:
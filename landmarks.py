@@ -0,0 +1,92 @@
+from array import array
+import numpy as np
+from typing import Callable, List, Tuple, Optional
+from occupancy_grid import OccupancyGrid, OBSTACLE
+from search_engines import bfs_distances
+
+class LandmarkHeuristic:
+    def __init__(self, grid: OccupancyGrid, count: int = 8,
+                 landmarks: Optional[List[Tuple[int, int]]] = None,
+                 distances: Optional[np.ndarray] = None):
+        self.grid = grid
+        self.cols = grid.cols
+        if landmarks is None:
+            landmarks, distances = self.select_landmarks(grid, count)
+        elif distances is None:
+            distances = np.stack([bfs_distances(grid.cells, landmark).reshape(-1) for landmark in landmarks])
+        self.landmarks = [tuple(landmark) for landmark in landmarks]
+        self.distances = np.asarray(distances, dtype=np.int32).reshape(len(self.landmarks), -1)
+        self._tables = [array('i', row.tobytes()) for row in self.distances]
+        self.stale = False
+        grid.add_listener(self.on_cell_changed)
+    
+    def detach(self):
+        self.grid.remove_listener(self.on_cell_changed)
+    
+    @staticmethod
+    def select_landmarks(grid: OccupancyGrid, count: int) -> Tuple[List[Tuple[int, int]], np.ndarray]:
+        # Farthest-point selection: each new landmark is the free cell whose
+        # distance to the closest existing landmark is largest. Cells in other
+        # components count as infinitely far, so every component gets covered.
+        free = np.flatnonzero(grid.passable_mask())
+        if free.size == 0:
+            return [], np.zeros((0, grid.rows * grid.cols), dtype=np.int32)
+        seed = bfs_distances(grid.cells, divmod(int(free[0]), grid.cols)).reshape(-1)
+        candidate = int(np.argmax(seed))
+        
+        landmarks = []
+        tables = []
+        closest = np.full(grid.rows * grid.cols, np.iinfo(np.int32).max, dtype=np.int64)
+        for _ in range(min(count, free.size)):
+            landmark = divmod(candidate, grid.cols)
+            table = bfs_distances(grid.cells, landmark).reshape(-1)
+            landmarks.append(landmark)
+            tables.append(table)
+            closest = np.where(table >= 0, np.minimum(closest, table), closest)
+            scores = np.where(grid.passable_mask().reshape(-1), closest, -1)
+            candidate = int(np.argmax(scores))
+            if scores[candidate] <= 0:
+                break
+        return landmarks, np.stack(tables)
+    
+    def on_cell_changed(self, row: int, col: int, old: int, new: int):
+        # New obstacles only lengthen true distances, so the old tables stay
+        # admissible; a freed cell can create shortcuts they do not know about.
+        if old == OBSTACLE and new != OBSTACLE:
+            self.stale = True
+    
+    def for_goal(self, goal: Tuple[int, int]) -> Callable[[int], int]:
+        cols = self.cols
+        goal_row, goal_col = goal
+        goal_idx = goal_row * cols + goal_col
+        pairs = [(table, table[goal_idx]) for table in self._tables if table[goal_idx] >= 0]
+        
+        def heuristic(idx: int) -> int:
+            row, col = divmod(idx, cols)
+            best = abs(row - goal_row) + abs(col - goal_col)
+            for table, goal_distance in pairs:
+                distance = table[idx]
+                if distance >= 0:
+                    bound = goal_distance - distance if goal_distance > distance else distance - goal_distance
+                    if bound > best:
+                        best = bound
+            return best
+        
+        return heuristic
+    
+    def save(self, filename: str):
+        np.savez_compressed(
+            filename,
+            landmarks=np.array(self.landmarks, dtype=np.int64).reshape(-1, 2),
+            distances=self.distances,
+            digest=np.array(self.grid.digest()),
+        )
+    
+    @classmethod
+    def load(cls, filename: str, grid: OccupancyGrid) -> 'LandmarkHeuristic':
+        with np.load(filename) as data:
+            if str(data['digest']) != grid.digest():
+                raise ValueError(f"Landmark tables in {filename} do not match the grid")
+            landmarks = [tuple(landmark) for landmark in data['landmarks'].tolist()]
+            distances = data['distances']
+        return cls(grid, len(landmarks), landmarks, distances)
@@ -0,0 +1,108 @@
+import os
+import struct
+import sys
+import numpy as np
+from occupancy_grid import OccupancyGrid
+
+# Header: magic, format version, body encoding, reserved, rows, cols.
+# The body starts right after it so a uint8 body can be mapped as-is.
+MAGIC = b'OGRD'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHBBII')
+ENCODING_UINT8 = 0
+ENCODING_BITS = 1
+BINARY_EXTENSIONS = ('.grid', '.bin')
+
+def is_binary_map(filename: str) -> bool:
+    if os.path.splitext(filename)[1].lower() in BINARY_EXTENSIONS:
+        return True
+    try:
+        with open(filename, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def read_header(filename: str):
+    with open(filename, 'rb') as file:
+        header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{filename} is too short to be a binary map")
+    magic, version, encoding, _, rows, cols = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{filename} is not a binary map")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"{filename} uses map format version {version}, newer than {FORMAT_VERSION}")
+    if encoding not in (ENCODING_UINT8, ENCODING_BITS):
+        raise ValueError(f"{filename} has unknown body encoding {encoding}")
+    return rows, cols, encoding
+
+def save_binary(cells: np.ndarray, filename: str, packed: bool = False):
+    cells = np.ascontiguousarray(cells, dtype=np.uint8)
+    rows, cols = cells.shape
+    if packed:
+        if cells.max(initial=0) > 1:
+            raise ValueError("Only 0/1 grids can be bit-packed")
+        body = np.packbits(cells, axis=None)
+    else:
+        body = cells
+    encoding = ENCODING_BITS if packed else ENCODING_UINT8
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, encoding, 0, rows, cols))
+        file.write(body.tobytes())
+
+def load_binary(filename: str, writable: bool = True) -> np.ndarray:
+    # A uint8 body is mapped straight from the file. Copy-on-write mode keeps
+    # edits private to the process: untouched pages stay shared with the page
+    # cache and the file on disk is never modified.
+    rows, cols, encoding = read_header(filename)
+    if encoding == ENCODING_UINT8:
+        expected = HEADER.size + rows * cols
+        if os.path.getsize(filename) < expected:
+            raise ValueError(f"{filename} is truncated")
+        return np.memmap(filename, dtype=np.uint8, mode='c' if writable else 'r',
+                         offset=HEADER.size, shape=(rows, cols))
+    packed = np.fromfile(filename, dtype=np.uint8, offset=HEADER.size)
+    if packed.size * 8 < rows * cols:
+        raise ValueError(f"{filename} is truncated")
+    return np.unpackbits(packed, count=rows * cols).reshape(rows, cols)
+
+def map_shape(filename: str):
+    # Binary maps answer from the header without touching the body.
+    if is_binary_map(filename):
+        rows, cols, _ = read_header(filename)
+        return rows, cols
+    return load_map(filename).shape
+
+def load_map(filename: str) -> OccupancyGrid:
+    if is_binary_map(filename):
+        return OccupancyGrid(load_binary(filename))
+    return OccupancyGrid.from_csv(filename)
+
+def save_map(grid: OccupancyGrid, filename: str, packed: bool = False):
+    if os.path.splitext(filename)[1].lower() in BINARY_EXTENSIONS:
+        save_binary(grid.cells, filename, packed)
+    else:
+        grid.to_csv(filename)
+
+def csv_to_binary(csv_file: str, binary_file: str, packed: bool = False):
+    save_binary(OccupancyGrid.from_csv(csv_file).cells, binary_file, packed)
+
+def binary_to_csv(binary_file: str, csv_file: str):
+    OccupancyGrid(load_binary(binary_file, writable=False)).to_csv(csv_file)
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    packed = '--packed' in args
+    if packed:
+        args.remove('--packed')
+    if len(args) != 2:
+        print("Usage: python map_format.py [--packed] SOURCE DEST")
+        print("Converts between CSV maps and binary .grid maps (direction follows the extensions).")
+        return 1
+    source, dest = args
+    save_map(load_map(source), dest, packed)
+    print(f"Wrote {dest}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
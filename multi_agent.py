@@ -0,0 +1,218 @@
+import heapq
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from occupancy_grid import OccupancyGrid, OBSTACLE
+from distance_field import DistanceFieldCache
+from search_engines import STEPS, SearchStats, flat_cells
+
+# Moves in a space-time search: the four grid steps plus waiting in place.
+MOVES = STEPS + ((0, 0),)
+
+class ReservationTable:
+    # Space-time reservations keyed by plain ints: a vertex key is
+    # time * size + cell and an edge key is (time * size + from) * size + to,
+    # so lookups never build tuples. Agents that have arrived stay parked on
+    # their goal from the arrival time on.
+    def __init__(self, size: int):
+        self.size = size
+        self.vertices: Dict[int, int] = {}
+        self.edges = set()
+        self.parked: Dict[int, int] = {}
+        self.last_visit: Dict[int, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.vertices) + len(self.edges) + len(self.parked)
+    
+    def clear(self):
+        self.vertices.clear()
+        self.edges.clear()
+        self.parked.clear()
+        self.last_visit.clear()
+    
+    def is_free(self, cell: int, t: int) -> bool:
+        if self.vertices.get(t * self.size + cell) is not None:
+            return False
+        arrival = self.parked.get(cell)
+        return arrival is None or arrival > t
+    
+    def swap_blocked(self, cell: int, next_cell: int, t: int) -> bool:
+        # Moving cell -> next_cell between t and t + 1 collides head-on with
+        # an agent moving next_cell -> cell in the same step.
+        return ((t * self.size + next_cell) * self.size + cell) in self.edges
+    
+    def reserve_path(self, agent: int, cells: Sequence[int]):
+        size = self.size
+        for t, cell in enumerate(cells):
+            self.vertices[t * size + cell] = agent
+            if self.last_visit.get(cell, -1) < t:
+                self.last_visit[cell] = t
+            if t:
+                self.edges.add(((t - 1) * size + cells[t - 1]) * size + cell)
+        goal = cells[-1]
+        arrival = len(cells) - 1
+        if self.parked.get(goal, arrival + 1) > arrival:
+            self.parked[goal] = arrival
+
+class RoundStats:
+    def __init__(self, agents: int):
+        self.agents = agents
+        self.planned = 0
+        self.failed = 0
+        self.nodes_expanded = 0
+        self.makespan = 0
+        self.sum_of_costs = 0
+        self.elapsed_seconds = 0.0
+    
+    @property
+    def agents_per_second(self) -> float:
+        return self.agents / self.elapsed_seconds if self.elapsed_seconds else 0.0
+    
+    def __repr__(self):
+        return (f"RoundStats(agents={self.agents}, planned={self.planned}, failed={self.failed}, "
+                f"makespan={self.makespan}, sum_of_costs={self.sum_of_costs}, "
+                f"nodes_expanded={self.nodes_expanded}, elapsed_seconds={self.elapsed_seconds:.4f}, "
+                f"agents_per_second={self.agents_per_second:.1f})")
+
+class CooperativePlanner:
+    # Cooperative A*: agents are planned one after another through a
+    # space-time search that avoids the reservations of agents planned
+    # before them. The heuristic is the exact single-agent distance to the
+    # goal (a cached BFS field per goal), so each search only detours where
+    # reservations get in the way and the cost per extra agent stays close
+    # to that of a single search.
+    def __init__(self, grid: OccupancyGrid, field_cache: Optional[DistanceFieldCache] = None,
+                 horizon_slack: int = 64, max_expansions: int = 100_000):
+        self.grid = grid
+        self.field_cache = field_cache if field_cache is not None else DistanceFieldCache()
+        self.horizon_slack = horizon_slack
+        self.max_expansions = max_expansions
+        self.rounds: List[RoundStats] = []
+    
+    def plan(self, agents: Sequence[Tuple[Tuple[int, int], Tuple[int, int]]],
+             stats: Optional[SearchStats] = None) -> List[Optional[List[Tuple[int, int]]]]:
+        round_stats = RoundStats(len(agents))
+        started = time.perf_counter()
+        cols = self.grid.cols
+        table = ReservationTable(self.grid.rows * cols)
+        agents = [(tuple(start), tuple(goal)) for start, goal in agents]
+        
+        # Shortest trips go first. They park early, and agents planned after
+        # them route around the parked cars; planning long trips first leaves
+        # them crossing goals that later agents then cannot stop on.
+        fields = [self.field_cache.get(self.grid, goal) for _, goal in agents]
+        order = sorted(range(len(agents)), key=lambda agent: fields[agent].distance(agents[agent][0]))
+        
+        paths: List[Optional[List[Tuple[int, int]]]] = [None] * len(agents)
+        for agent in order:
+            start, goal = agents[agent]
+            cells = self._search(agent, start, goal, fields[agent], table, round_stats)
+            if cells is None:
+                round_stats.failed += 1
+                continue
+            table.reserve_path(agent, cells)
+            paths[agent] = [divmod(cell, cols) for cell in cells]
+            round_stats.planned += 1
+            round_stats.sum_of_costs += len(cells) - 1
+            round_stats.makespan = max(round_stats.makespan, len(cells) - 1)
+        
+        round_stats.elapsed_seconds = time.perf_counter() - started
+        self.rounds.append(round_stats)
+        if stats is not None:
+            stats.engine = 'cooperative'
+            stats.searches += len(agents)
+            stats.nodes_expanded += round_stats.nodes_expanded
+            stats.elapsed_seconds += round_stats.elapsed_seconds
+        return paths
+    
+    def _search(self, agent: int, start: Tuple[int, int], goal: Tuple[int, int], field,
+                table: ReservationTable, round_stats: RoundStats) -> Optional[List[int]]:
+        rows, cols = self.grid.rows, self.grid.cols
+        size = rows * cols
+        grid = flat_cells(self.grid.cells)
+        distances = memoryview(field.distances.reshape(-1))
+        start_idx = start[0] * cols + start[1]
+        goal_idx = goal[0] * cols + goal[1]
+        h = distances[start_idx]
+        if h < 0 or grid[start_idx] == OBSTACLE:
+            return None
+        horizon = max(h, table.last_visit.get(goal_idx, -1) + 1) + self.horizon_slack
+        max_expansions = self.max_expansions
+        
+        start_key = start_idx
+        parent = {start_key: -1}
+        closed = set()
+        open_list = [(h, h, start_key)]
+        expanded = 0
+        found = None
+        while open_list:
+            _, _, key = heapq.heappop(open_list)
+            if key in closed:
+                continue
+            closed.add(key)
+            expanded += 1
+            if expanded > max_expansions:
+                break
+            t, idx = divmod(key, size)
+            # An agent may only stop on its goal if nobody needs that cell later.
+            if idx == goal_idx and table.last_visit.get(goal_idx, -1) <= t:
+                found = key
+                break
+            if t >= horizon:
+                continue
+            
+            row, col = divmod(idx, cols)
+            next_t = t + 1
+            for dr, dc in MOVES:
+                n_row = row + dr
+                n_col = col + dc
+                if not (0 <= n_row < rows and 0 <= n_col < cols):
+                    continue
+                neighbor = n_row * cols + n_col
+                if grid[neighbor] == OBSTACLE or not table.is_free(neighbor, next_t):
+                    continue
+                if neighbor != idx and table.swap_blocked(idx, neighbor, t):
+                    continue
+                next_key = next_t * size + neighbor
+                if next_key in parent:
+                    continue
+                parent[next_key] = key
+                h = distances[neighbor]
+                heapq.heappush(open_list, (next_t + h, h, next_key))
+        
+        round_stats.nodes_expanded += expanded
+        if found is None:
+            return None
+        cells = []
+        key = found
+        while key != -1:
+            cells.append(key % size)
+            key = parent[key]
+        cells.reverse()
+        return cells
+
+def find_conflicts(paths: Sequence[Optional[List[Tuple[int, int]]]]) -> List[Tuple[int, int, int, str]]:
+    # Returns (time, agent_a, agent_b, kind) for every vertex or swap conflict,
+    # treating agents as parked on their last cell after they arrive.
+    planned = [(agent, path) for agent, path in enumerate(paths) if path]
+    if not planned:
+        return []
+    makespan = max(len(path) for _, path in planned)
+    position = lambda path, t: tuple(path[min(t, len(path) - 1)])
+    conflicts = []
+    for t in range(makespan):
+        occupied = {}
+        for agent, path in planned:
+            cell = position(path, t)
+            if cell in occupied:
+                conflicts.append((t, occupied[cell], agent, 'vertex'))
+            occupied[cell] = agent
+        if t == 0:
+            continue
+        moves = {}
+        for agent, path in planned:
+            moves[(position(path, t - 1), position(path, t))] = agent
+        for (a, b), agent in moves.items():
+            other = moves.get((b, a))
+            if a != b and other is not None and other < agent:
+                conflicts.append((t, other, agent, 'swap'))
+    return conflicts
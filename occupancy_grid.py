@@ -0,0 +1,273 @@
+import csv
+import hashlib
+import itertools
+import tempfile
+import numpy as np
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+FREE = 0
+OBSTACLE = 1
+
+# Cost of entering a cell, indexed by its value: free cells cost 1, values
+# 2..255 are weighted cells costing their value, and obstacles (cost 0 here)
+# cannot be entered at all. Plain 0/1 maps are therefore unit-cost maps.
+MAX_COST = 255
+COST_TABLE = (1, 0) + tuple(range(2, MAX_COST + 1))
+
+# Bit i of a cell's neighbor mask is set when NEIGHBOR_STEPS[i] (right, down,
+# left, up) leads to an in-bounds passable cell; obstacles have mask 0.
+# MASK_STEPS maps each of the 16 masks to its moves in that order.
+NEIGHBOR_STEPS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+MASK_STEPS = tuple(tuple(step for bit, step in enumerate(NEIGHBOR_STEPS) if mask >> bit & 1)
+                   for mask in range(16))
+
+# Versions are drawn from one process-wide counter so a reloaded grid never
+# reuses a version number of the grid it replaced.
+_version_counter = itertools.count(1)
+
+def build_neighbor_masks(cells: np.ndarray) -> np.ndarray:
+    passable = cells != OBSTACLE
+    masks = np.zeros(cells.shape, dtype=np.uint8)
+    masks[:, :-1] |= (passable[:, :-1] & passable[:, 1:]).view(np.uint8)
+    masks[:-1, :] |= (passable[:-1, :] & passable[1:, :]).view(np.uint8) << 1
+    masks[:, 1:] |= (passable[:, 1:] & passable[:, :-1]).view(np.uint8) << 2
+    masks[1:, :] |= (passable[1:, :] & passable[:-1, :]).view(np.uint8) << 3
+    return masks
+
+class OccupancyGrid:
+    def __init__(self, cells: np.ndarray, neighbor_masks: Optional[np.ndarray] = None):
+        cells = np.ascontiguousarray(cells, dtype=np.uint8)
+        if cells.ndim != 2 or cells.size == 0:
+            raise ValueError("Grid must be a non-empty 2D array")
+        self.cells = cells
+        self.rows, self.cols = cells.shape
+        self.version = next(_version_counter)
+        self._passable = None
+        self._passable_version = None
+        self._cost_range = None
+        self._cost_range_version = None
+        self._neighbor_masks = neighbor_masks
+        self._listeners = []
+    
+    @classmethod
+    def from_csv(cls, filename: str) -> 'OccupancyGrid':
+        with open(filename, 'r') as file:
+            rows = [row for row in csv.reader(file) if row]
+        if not rows:
+            raise ValueError(f"Grid file {filename} is empty")
+        return cls(np.array(rows, dtype=np.uint8))
+    
+    def to_csv(self, filename: str):
+        np.savetxt(filename, self.cells, fmt='%d', delimiter=',')
+    
+    def digest(self) -> str:
+        return hashlib.blake2b(self.cells.tobytes(), digest_size=16).hexdigest()
+    
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.rows, self.cols
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    def __getitem__(self, key):
+        return self.cells[key]
+    
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(self.cells)
+    
+    def in_bounds(self, row: int, col: int) -> bool:
+        return 0 <= row < self.rows and 0 <= col < self.cols
+    
+    def is_passable(self, row: int, col: int) -> bool:
+        return self.cells[row, col] != OBSTACLE
+    
+    def is_blocked(self, row: int, col: int) -> bool:
+        return self.cells[row, col] == OBSTACLE
+    
+    def passable_mask(self) -> np.ndarray:
+        if self._passable_version != self.version:
+            self._passable = self.cells != OBSTACLE
+            self._passable.setflags(write=False)
+            self._passable_version = self.version
+        return self._passable
+    
+    def cost_range(self) -> Tuple[int, int]:
+        # (cheapest, most expensive) cost of entering a passable cell.
+        if self._cost_range_version != self.version:
+            values = np.flatnonzero(np.bincount(self.cells.reshape(-1), minlength=MAX_COST + 1))
+            costs = [COST_TABLE[value] for value in values if value != OBSTACLE]
+            self._cost_range = (min(costs), max(costs)) if costs else (1, 1)
+            self._cost_range_version = self.version
+        return self._cost_range
+    
+    def is_weighted(self) -> bool:
+        return self.cost_range()[1] > 1
+    
+    def cost(self, row: int, col: int) -> int:
+        return COST_TABLE[self.cells[row, col]]
+    
+    def neighbor_masks(self) -> np.ndarray:
+        # Built on first use, then kept current by set_cell.
+        if self._neighbor_masks is None:
+            self._neighbor_masks = build_neighbor_masks(self.cells)
+        return self._neighbor_masks
+    
+    def _update_neighbor_masks(self, row: int, col: int):
+        # Only the edited cell and the bits of its four neighbours that point
+        # back at it can change. Opposite directions differ in bit 1.
+        cells = self.cells
+        masks = self._neighbor_masks
+        passable = cells[row, col] != OBSTACLE
+        mask = 0
+        for bit, (dr, dc) in enumerate(NEIGHBOR_STEPS):
+            n_row = row + dr
+            n_col = col + dc
+            if not (0 <= n_row < self.rows and 0 <= n_col < self.cols):
+                continue
+            back = 1 << (bit ^ 2)
+            if passable and cells[n_row, n_col] != OBSTACLE:
+                mask |= 1 << bit
+                masks[n_row, n_col] |= back
+            else:
+                masks[n_row, n_col] &= 0xF ^ back
+        masks[row, col] = mask
+    
+    def add_listener(self, callback: Callable[[int, int, int, int], None]):
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[int, int, int, int], None]):
+        self._listeners.remove(callback)
+    
+    def set_cell(self, row: int, col: int, value: int):
+        old = int(self.cells[row, col])
+        if old == value:
+            return
+        self.cells[row, col] = value
+        self.version = next(_version_counter)
+        if self._neighbor_masks is not None and (old == OBSTACLE) != (value == OBSTACLE):
+            self._update_neighbor_masks(row, col)
+        for callback in self._listeners:
+            callback(row, col, old, value)
+    
+    def toggle(self, row: int, col: int) -> int:
+        value = FREE if self.cells[row, col] == OBSTACLE else OBSTACLE
+        self.set_cell(row, col, value)
+        return value
+
+class GridSnapshot(OccupancyGrid):
+    # Read-only grid returned by GridHistory.snapshot(). source_version is
+    # the live grid's version when the snapshot was taken.
+    def __init__(self, cells: np.ndarray, neighbor_masks: np.ndarray, source_version: int):
+        super().__init__(cells, neighbor_masks)
+        self.source_version = source_version
+
+Edit = Tuple[int, int, int, int]
+
+class GridHistory:
+    # Versioned edit layer over a live grid. The cells (and neighbor masks) at
+    # attach time are written once to an anonymous file and kept as the
+    # immutable baseline; afterwards only the edits are stored, as a log of
+    # (row, col, old, new) actions plus the net delta from the baseline. Undo,
+    # redo and reset replay logged edits through set_cell, so every listener
+    # updates incrementally. Snapshots map the baseline copy-on-write and
+    # apply the net delta, so only the pages holding edited cells are copied.
+    def __init__(self, grid: OccupancyGrid):
+        self.grid = grid
+        self._file = tempfile.TemporaryFile()
+        self._file.write(grid.cells.tobytes())
+        self._file.write(grid.neighbor_masks().tobytes())
+        self._file.flush()
+        self._shape = (2, grid.rows, grid.cols)
+        self.baseline = np.memmap(self._file, dtype=np.uint8, mode='r', shape=self._shape)[0]
+        self.delta: Dict[Tuple[int, int], int] = {}
+        self._actions: List[List[Edit]] = []
+        self._position = 0
+        self._group = None
+        self._grouping = False
+        self._replaying = False
+        grid.add_listener(self.on_cell_changed)
+    
+    def detach(self):
+        self.grid.remove_listener(self.on_cell_changed)
+        self._file.close()
+    
+    def on_cell_changed(self, row: int, col: int, old: int, new: int):
+        if new == self.baseline[row, col]:
+            self.delta.pop((row, col), None)
+        else:
+            self.delta[(row, col)] = new
+        if self._replaying:
+            return
+        if self._group is None:
+            # A new edit discards anything that could still be redone.
+            del self._actions[self._position:]
+            self._group = []
+            self._actions.append(self._group)
+            self._position += 1
+        self._group.append((row, col, old, new))
+        if not self._grouping:
+            self._group = None
+    
+    def begin_action(self):
+        # Edits until end_action() are undone and redone together, e.g. one
+        # mouse drag across many cells.
+        self._grouping = True
+        self._group = None
+    
+    def end_action(self):
+        self._grouping = False
+        self._group = None
+    
+    @property
+    def can_undo(self) -> bool:
+        return self._position > 0
+    
+    @property
+    def can_redo(self) -> bool:
+        return self._position < len(self._actions)
+    
+    def _replay(self, edits, undo: bool):
+        self._group = None
+        self._replaying = True
+        try:
+            for row, col, old, new in edits:
+                self.grid.set_cell(row, col, old if undo else new)
+        finally:
+            self._replaying = False
+    
+    def undo(self) -> bool:
+        if not self.can_undo:
+            return False
+        self._position -= 1
+        self._replay(reversed(self._actions[self._position]), undo=True)
+        return True
+    
+    def redo(self) -> bool:
+        if not self.can_redo:
+            return False
+        self._replay(self._actions[self._position], undo=False)
+        self._position += 1
+        return True
+    
+    def reset(self) -> int:
+        # Restores the baseline by reverting only the cells in the delta. The
+        # reset is logged as one action, so it can be undone as well.
+        changed = list(self.delta)
+        grouping = self._grouping
+        self.begin_action()
+        for row, col in changed:
+            self.grid.set_cell(row, col, int(self.baseline[row, col]))
+        self._grouping = grouping
+        self._group = None
+        return len(changed)
+    
+    def snapshot(self) -> GridSnapshot:
+        # Costs O(edits); the snapshot stays valid while the live grid changes.
+        mapped = np.memmap(self._file, dtype=np.uint8, mode='c', shape=self._shape)
+        snapshot = GridSnapshot(mapped[0], mapped[1], self.grid.version)
+        for (row, col), value in self.delta.items():
+            snapshot.set_cell(row, col, value)
+        snapshot.cells.setflags(write=False)
+        snapshot.neighbor_masks().setflags(write=False)
+        return snapshot
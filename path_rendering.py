@@ -0,0 +1,193 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.image import imsave
+from typing import Iterable, Iterator, List, Optional, Tuple
+from compact_path import CompactPath
+from occupancy_grid import OBSTACLE
+
+Job = Tuple[str, Optional[List[Tuple[int, int]]]]
+
+# Same colours as CarPathfinder.visualize_grid: free, obstacle, path, start, end.
+PALETTE = (colormaps['RdYlGn_r']([0.0, 1.0, 0.5, 0.3, 0.7])[:, :3] * 255).round().astype(np.uint8)
+FREE_COLOR, OBSTACLE_COLOR, PATH_COLOR, START_COLOR, END_COLOR = PALETTE
+
+_worker_state = {}
+
+class PathImageRenderer:
+    # Headless renderer for route audits. The map is converted to an RGB
+    # image once; each path is painted onto a copy of it as a mask. Figures
+    # are built on an Agg canvas directly, without pyplot, so no GUI backend
+    # is ever started. With annotate=True a single titled figure is reused
+    # and only its image data and title change between paths.
+    def __init__(self, cells: np.ndarray, scale: int = 1, annotate: bool = False, dpi: int = 100):
+        if scale < 1:
+            raise ValueError("scale must be at least 1")
+        self.cells = cells
+        self.scale = scale
+        self.base = np.where((cells == OBSTACLE)[..., None], OBSTACLE_COLOR, FREE_COLOR).astype(np.uint8)
+        self.frame = np.empty_like(self.base)
+        self.figure = None
+        if annotate:
+            self.figure = Figure(figsize=(15, 10), dpi=dpi)
+            FigureCanvasAgg(self.figure)
+            ax = self.figure.add_subplot()
+            self._image = ax.imshow(self._scaled(self.base), interpolation='nearest')
+            self._title = ax.set_title('')
+            ax.set_xlabel('X Coordinate')
+            ax.set_ylabel('Y Coordinate')
+            self.figure.tight_layout()
+    
+    def _scaled(self, image: np.ndarray) -> np.ndarray:
+        if self.scale == 1:
+            return image
+        return np.repeat(np.repeat(image, self.scale, axis=0), self.scale, axis=1)
+    
+    def render(self, path, start: Optional[Tuple[int, int]] = None,
+               end: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        # Returns the RGB image. At scale 1 it is a buffer reused by the next
+        # call; copy it to keep it.
+        frame = self.frame
+        np.copyto(frame, self.base)
+        if path:
+            if isinstance(path, CompactPath):
+                # Every straight run is painted as a single slice.
+                for (row0, col0), (row1, col1) in path.segments():
+                    frame[min(row0, row1):max(row0, row1) + 1, min(col0, col1):max(col0, col1) + 1] = PATH_COLOR
+            else:
+                positions = np.asarray(path, dtype=np.intp).reshape(-1, 2)
+                frame[positions[:, 0], positions[:, 1]] = PATH_COLOR
+            start = path[0] if start is None else start
+            end = path[-1] if end is None else end
+        if start is not None:
+            frame[start[0], start[1]] = START_COLOR
+        if end is not None:
+            frame[end[0], end[1]] = END_COLOR
+        return self._scaled(frame)
+    
+    def save(self, filename: str, path, start: Optional[Tuple[int, int]] = None,
+             end: Optional[Tuple[int, int]] = None, title: Optional[str] = None):
+        image = self.render(path, start, end)
+        if self.figure is None:
+            imsave(filename, image)
+            return
+        if title is None and path:
+            title = f"Path {tuple(path[0])} -> {tuple(path[-1])}: {len(path)} steps"
+        self._image.set_data(image)
+        self._title.set_text(title or "No path")
+        self.figure.savefig(filename)
+
+def _init_worker(shm_name: str, shape: Tuple[int, int], scale: int, annotate: bool, dpi: int):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    cells = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    cells.setflags(write=False)
+    _worker_state['shm'] = shm
+    _worker_state['renderer'] = PathImageRenderer(cells, scale, annotate, dpi)
+
+def _render_chunk(jobs: List[Job]) -> int:
+    renderer = _worker_state['renderer']
+    for filename, path in jobs:
+        renderer.save(filename, path)
+    return len(jobs)
+
+def _chunked(jobs: Iterable[Job], chunk_size: int) -> Iterator[List[Job]]:
+    iterator = iter(jobs)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def render_paths(cells: np.ndarray, jobs: Iterable[Job], workers: Optional[int] = None, scale: int = 1,
+                 annotate: bool = False, dpi: int = 100, chunk_size: int = 32) -> int:
+    # Writes one image per (filename, path) job and returns how many were
+    # written. Workers share the map through shared memory and each builds
+    # its renderer (base image and figure) once.
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    if workers <= 1:
+        renderer = PathImageRenderer(cells, scale, annotate, dpi)
+        written = 0
+        for filename, path in jobs:
+            renderer.save(filename, path)
+            written += 1
+        return written
+    
+    shm = shared_memory.SharedMemory(create=True, size=cells.nbytes)
+    shared = None
+    pool = None
+    try:
+        shared = np.ndarray(cells.shape, dtype=np.uint8, buffer=shm.buf)
+        shared[:] = cells
+        pool = multiprocessing.get_context().Pool(
+            workers, initializer=_init_worker, initargs=(shm.name, cells.shape, scale, annotate, dpi))
+        
+        pending = deque()
+        max_pending = workers * 2
+        written = 0
+        for chunk in _chunked(jobs, chunk_size):
+            pending.append(pool.apply_async(_render_chunk, (chunk,)))
+            while len(pending) >= max_pending:
+                written += pending.popleft().get()
+        while pending:
+            written += pending.popleft().get()
+        return written
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        del shared
+        shm.close()
+        shm.unlink()
+
+def read_queries(filename: str) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    # One query per line: start_row,start_col,end_row,end_col
+    queries = []
+    with open(filename, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            r1, c1, r2, c2 = (int(value) for value in line.split(','))
+            queries.append(((r1, c1), (r2, c2)))
+    return queries
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan routes and render each one to a PNG, headless.")
+    parser.add_argument('map', help="map file (.csv or .grid)")
+    parser.add_argument('out_dir', help="directory for the images")
+    parser.add_argument('--queries', metavar='FILE', help="file of start_row,start_col,end_row,end_col lines")
+    parser.add_argument('--random', type=int, default=100, help="number of random queries when --queries is not given")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--scale', type=int, default=1, help="pixels per cell")
+    parser.add_argument('--annotate', action='store_true', help="render a titled figure with axes instead of a bare image")
+    args = parser.parse_args()
+    # Imported here: both modules pull in pyplot, which the renderer itself
+    # never needs.
+    from benchmark import sample_queries
+    from pathfinding_car import CarPathfinder
+    
+    pathfinder = CarPathfinder(args.map, cache_size=0)
+    if args.queries:
+        queries = read_queries(args.queries)
+    else:
+        queries = sample_queries(pathfinder, args.random, args.seed)
+    os.makedirs(args.out_dir, exist_ok=True)
+    
+    paths = pathfinder.astar_pathfind_many(queries, args.workers)
+    jobs = ((os.path.join(args.out_dir, f"route_{i:05d}_{start[0]}_{start[1]}_{end[0]}_{end[1]}.png"), path)
+            for i, ((start, end), path) in enumerate(zip(queries, paths)))
+    written = render_paths(pathfinder.grid.cells, jobs, args.workers, args.scale, args.annotate)
+    print(f"Wrote {written} images to {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,26 @@
-import csv
 import heapq
-import matplotlib.pyplot as plt
-import numpy as np
-from typing import List, Tuple, Optional
+import logging
+import os
+import time
+from contextlib import nullcontext
+from typing import Callable, Iterable, Iterator, List, Tuple, Optional
+from occupancy_grid import MASK_STEPS, GridSnapshot, OccupancyGrid, OBSTACLE
+from map_format import load_map
+from search_engines import (SEARCH_ENGINES, WEIGHTED_ENGINES, SearchStats, SearchWorkspace, astar_array,
+                            dial_search, path_cost, reusable_workspace)
+from batch_pathfinding import iter_batch_pathfind
+from route_cache import RouteCache, MISS
+from connectivity import ComponentIndex
+from incremental_planner import DStarLite
+from hierarchical_pathfinder import HierarchicalMap
+from landmarks import LandmarkHeuristic
+from distance_field import DistanceField, DistanceFieldCache
+from search_profiling import SamplingProfiler
+from multi_agent import CooperativePlanner
+from anytime_planner import AnytimeResult, CancelToken, ara_star
+from compact_path import CompactPath, DIRECTION_NAMES
+
+logger = logging.getLogger(__name__)
 
 class Node:
     def __init__(self, position: Tuple[int, int], g_cost: float = 0, h_cost: float = 0, parent=None):
@@ -16,24 +34,38 @@ class Node:
         return self.f_cost < other.f_cost
 
 class CarPathfinder:
-    def __init__(self, grid_file: str):
+    def __init__(self, grid_file: str, engine: str = 'array', cache_size: int = 1024,
+                 field_cache_bytes: int = 64 * 1024 * 1024):
+        self.engine = engine
+        self.route_cache = RouteCache(cache_size)
+        self.field_cache = DistanceFieldCache(field_cache_bytes)
         self.grid = self.load_grid(grid_file)
-        self.rows = len(self.grid)
-        self.cols = len(self.grid[0])
-        
-    def load_grid(self, filename: str) -> List[List[int]]:
-        grid = []
-        with open(filename, 'r') as file:
-            csv_reader = csv.reader(file)
-            for row in csv_reader:
-                grid.append([int(cell) for cell in row])
-        return grid
+        self.rows = self.grid.rows
+        self.cols = self.grid.cols
+        self._components = None
+        self._workspace = None
+        self._incremental_planner = None
+        self.hierarchy = None
+        self.landmarks = None
+        self.profiler = None
+        self.fleet_planner = None
+    
+    def load_grid(self, filename: str) -> OccupancyGrid:
+        return load_map(filename)
+    
+    @property
+    def components(self) -> ComponentIndex:
+        # Labeled on first use, so loading a mapped .grid file stays cheap.
+        if self._components is None:
+            self._components = ComponentIndex(self.grid)
+        return self._components
     
     def visualize_grid(self, path: Optional[List[Tuple[int, int]]] = None, start: Optional[Tuple[int, int]] = None, end: Optional[Tuple[int, int]] = None):
+        # Imported on demand so headless users never load a GUI backend.
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(figsize=(15, 10))
         
-        grid_array = np.array(self.grid)
-        display_grid = grid_array.copy().astype(float)
+        display_grid = (self.grid.cells == OBSTACLE).astype(float)
         
         if path:
             for pos in path:
@@ -63,24 +95,103 @@ class CarPathfinder:
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
     
     def get_neighbors(self, position: Tuple[int, int]) -> List[Tuple[int, int]]:
-        neighbors = []
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        row, col = position
+        return [(row + dr, col + dc) for dr, dc in MASK_STEPS[self.grid.neighbor_masks()[row, col]]]
+    
+    def workspace(self) -> SearchWorkspace:
+        # Search buffers shared by every query on this pathfinder (one search
+        # at a time), so a query no longer allocates grid-sized arrays.
+        self._workspace = reusable_workspace(self._workspace, self.grid.rows, self.grid.cols)
+        return self._workspace
+    
+    def default_engine(self) -> str:
+        # Weighted maps need a cost-aware engine; the unit-cost engines would
+        # return the fewest cells rather than the cheapest route.
+        if self.engine not in WEIGHTED_ENGINES and self.grid.is_weighted():
+            return 'dial'
+        return self.engine
+    
+    def path_cost(self, path: List[Tuple[int, int]]) -> int:
+        return path_cost(self.grid.cells, path)
+    
+    def astar_pathfind(self, start: Tuple[int, int], end: Tuple[int, int], engine: Optional[str] = None,
+                       stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int]]]:
+        engine = engine or self.default_engine()
+        if engine not in ('reference', 'alt') and engine not in SEARCH_ENGINES:
+            raise ValueError(f"Unknown search engine: {engine}")
         
-        for dr, dc in directions:
-            new_row, new_col = position[0] + dr, position[1] + dc
-            
-            if (0 <= new_row < self.rows and 
-                0 <= new_col < self.cols and 
-                self.grid[new_row][new_col] == 0):
-                neighbors.append((new_row, new_col))
+        if self.grid.is_blocked(*start) or self.grid.is_blocked(*end):
+            logger.warning("Start or end position is blocked: %s -> %s", start, end)
+            if stats is not None:
+                stats.rejected += 1
+            return None
         
-        return neighbors
-    
-    def astar_pathfind(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
-        if self.grid[start[0]][start[1]] == 1 or self.grid[end[0]][end[1]] == 1:
-            print("Error: Start or end position is blocked!")
+        start, end = tuple(start), tuple(end)
+        version = self.grid.version
+        # Unit-cost and cost-aware engines only agree on unweighted maps.
+        weighted = engine in WEIGHTED_ENGINES and self.grid.is_weighted()
+        cached = self.route_cache.get(start, end, version, weighted)
+        if cached is not MISS:
+            if stats is not None:
+                stats.cache_hits += 1
+            return cached
+        if stats is not None and self.route_cache.max_entries > 0:
+            stats.cache_misses += 1
+        
+        if not self.components.connected(start, end):
+            if stats is not None:
+                stats.rejected += 1
             return None
         
+        if stats is not None:
+            stats.engine = engine
+            stats.searches += 1
+            stats.engines[engine] = stats.engines.get(engine, 0) + 1
+            started = time.perf_counter()
+        masks = self.grid.neighbor_masks()
+        workspace = self.workspace()
+        with self.profiler.sampling() if self.profiler is not None else nullcontext():
+            if engine == 'reference':
+                path = self.reference_pathfind(start, end, stats)
+            elif engine == 'alt':
+                heuristic = self.landmark_heuristic().for_goal(end)
+                path = astar_array(self.grid.cells, start, end, workspace, stats, heuristic, masks)
+            elif engine == 'dial':
+                min_cost, max_cost = self.grid.cost_range()
+                path = dial_search(self.grid.cells, start, end, workspace, stats, min_cost, max_cost, masks)
+            else:
+                path = SEARCH_ENGINES[engine](self.grid.cells, start, end, workspace, stats, masks=masks)
+        if stats is not None:
+            stats.elapsed_seconds += time.perf_counter() - started
+        self.route_cache.put(start, end, version, path, weighted)
+        return path
+    
+    def compact_pathfind(self, start: Tuple[int, int], end: Tuple[int, int], engine: Optional[str] = None,
+                         stats: Optional[SearchStats] = None) -> Optional[CompactPath]:
+        path = self.astar_pathfind(start, end, engine, stats)
+        return CompactPath.from_cells(path) if path else None
+    
+    def pathfind_with_stats(self, start: Tuple[int, int], end: Tuple[int, int],
+                            engine: Optional[str] = None) -> Tuple[Optional[List[Tuple[int, int]]], SearchStats]:
+        stats = SearchStats()
+        path = self.astar_pathfind(start, end, engine, stats)
+        return path, stats
+    
+    def enable_profiling(self, interval: float = 0.001) -> SamplingProfiler:
+        if self.profiler is None:
+            self.profiler = SamplingProfiler(interval)
+            self.profiler.start()
+        return self.profiler
+    
+    def disable_profiling(self) -> Optional[SamplingProfiler]:
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.stop()
+            self.profiler = None
+        return profiler
+    
+    def reference_pathfind(self, start: Tuple[int, int], end: Tuple[int, int],
+                           stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int]]]:
         open_list = []
         closed_set = set()
         
@@ -89,12 +200,20 @@ class CarPathfinder:
         
         came_from = {}
         g_score = {start: 0}
+        on_expand = stats.expansion_hook() if stats is not None else None
+        expanded = 0
+        pushes = 1
+        pops = 0
+        peak_open = 1
         
         while open_list:
             current_node = heapq.heappop(open_list)
             current_pos = current_node.position
+            pops += 1
             
             if current_pos == end:
+                if stats is not None:
+                    stats.record_search(expanded, pushes, pops, peak_open)
                 path = []
                 while current_pos in came_from:
                     path.append(current_pos)
@@ -103,6 +222,9 @@ class CarPathfinder:
                 return path[::-1]
             
             closed_set.add(current_pos)
+            expanded += 1
+            if on_expand is not None:
+                on_expand(*current_pos)
             
             for neighbor in self.get_neighbors(current_pos):
                 if neighbor in closed_set:
@@ -117,21 +239,155 @@ class CarPathfinder:
                     
                     neighbor_node = Node(neighbor, tentative_g, self.heuristic(neighbor, end))
                     heapq.heappush(open_list, neighbor_node)
+                    pushes += 1
+            peak_open = max(peak_open, len(open_list))
         
+        if stats is not None:
+            stats.record_search(expanded, pushes, pops, peak_open)
         return None
     
+    def astar_pathfind_many(self, queries: Iterable[Tuple[Tuple[int, int], Tuple[int, int]]],
+                            workers: Optional[int] = None, engine: Optional[str] = None,
+                            chunk_size: int = 256) -> List[Optional[List[Tuple[int, int]]]]:
+        return list(self.iter_pathfind_many(queries, workers, engine, chunk_size))
+    
+    def iter_pathfind_many(self, queries: Iterable[Tuple[Tuple[int, int], Tuple[int, int]]],
+                           workers: Optional[int] = None, engine: Optional[str] = None,
+                           chunk_size: int = 256) -> Iterator[Optional[List[Tuple[int, int]]]]:
+        engine = engine or self.default_engine()
+        # Workers only have the shared cells, so the node-based and landmark
+        # engines fall back to the array engine; path lengths are the same.
+        if engine in ('reference', 'alt'):
+            engine = 'array'
+        return iter_batch_pathfind(self.grid.cells, queries, workers, engine, chunk_size,
+                                   self.grid.neighbor_masks())
+    
+    def incremental_planner(self, start: Tuple[int, int], end: Tuple[int, int]) -> DStarLite:
+        start, end = tuple(start), tuple(end)
+        planner = self._incremental_planner
+        if planner is None or planner.grid is not self.grid or planner.goal != end:
+            if planner is not None:
+                planner.detach()
+            planner = DStarLite(self.grid, start, end)
+            self._incremental_planner = planner
+        elif planner.start != start:
+            planner.move_start(start)
+        return planner
+    
+    def replan(self, start: Tuple[int, int], end: Tuple[int, int],
+               stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int]]]:
+        planner = self.incremental_planner(start, end)
+        if not self.components.connected(planner.start, planner.goal):
+            return None
+        return planner.compute_path(stats)
+    
+    def anytime_pathfind(self, start: Tuple[int, int], end: Tuple[int, int],
+                         token: Optional[CancelToken] = None,
+                         on_improve: Optional[Callable[[AnytimeResult], None]] = None,
+                         epsilon: float = 3.0, stats: Optional[SearchStats] = None,
+                         grid: Optional[OccupancyGrid] = None) -> AnytimeResult:
+        # grid may be a GridSnapshot, so a worker thread can search a frozen
+        # copy while the live grid keeps changing. The component index is
+        # updated by the thread editing the live grid, so it is only consulted
+        # for the live grid; callers searching a snapshot check reachability
+        # themselves. The route cache is only filled while the snapshot still
+        # matches the live grid.
+        start, end = tuple(start), tuple(end)
+        grid = self.grid if grid is None else grid
+        version = grid.source_version if isinstance(grid, GridSnapshot) else grid.version
+        if grid.is_blocked(*start) or grid.is_blocked(*end):
+            logger.warning("Start or end position is blocked: %s -> %s", start, end)
+            if stats is not None:
+                stats.rejected += 1
+            return AnytimeResult(complete=True)
+        if grid is self.grid and not self.components.connected(start, end):
+            if stats is not None:
+                stats.rejected += 1
+            return AnytimeResult(complete=True)
+        
+        if stats is not None:
+            stats.engine = 'anytime'
+            stats.searches += 1
+            stats.engines['anytime'] = stats.engines.get('anytime', 0) + 1
+            started = time.perf_counter()
+        # ARA* honours cell costs, so on weighted maps its optimal result is
+        # the cheapest route, the same one 'dial' returns.
+        weighted = grid.is_weighted()
+        with self.profiler.sampling() if self.profiler is not None else nullcontext():
+            result = ara_star(grid.cells, start, end, token, epsilon, on_improve=on_improve, stats=stats,
+                              masks=grid.neighbor_masks(), min_cost=grid.cost_range()[0])
+        if stats is not None:
+            stats.elapsed_seconds += time.perf_counter() - started
+        # Only a finished search on an unchanged grid is exact enough to cache.
+        if result.optimal and self.grid.version == version:
+            self.route_cache.put(start, end, version, result.path, weighted)
+        return result
+    
+    def build_hierarchy(self, cluster_size: int = 16, cache_file: Optional[str] = None) -> HierarchicalMap:
+        if self.hierarchy is not None:
+            self.hierarchy.detach()
+        self.hierarchy = None
+        if cache_file and os.path.exists(cache_file):
+            try:
+                hierarchy = HierarchicalMap.load(cache_file, self.grid)
+                if hierarchy.cluster_size == cluster_size:
+                    self.hierarchy = hierarchy
+                else:
+                    hierarchy.detach()
+            except ValueError:
+                pass
+        if self.hierarchy is None:
+            self.hierarchy = HierarchicalMap(self.grid, cluster_size)
+            if cache_file:
+                self.hierarchy.save(cache_file)
+        return self.hierarchy
+    
+    def distance_field(self, goal: Tuple[int, int]) -> DistanceField:
+        return self.field_cache.get(self.grid, goal)
+    
+    def plan_fleet(self, agents: Iterable[Tuple[Tuple[int, int], Tuple[int, int]]],
+                   stats: Optional[SearchStats] = None) -> List[Optional[List[Tuple[int, int]]]]:
+        if self.fleet_planner is None or self.fleet_planner.grid is not self.grid:
+            self.fleet_planner = CooperativePlanner(self.grid, self.field_cache)
+        return self.fleet_planner.plan(list(agents), stats)
+    
+    def build_landmarks(self, count: int = 8, cache_file: Optional[str] = None) -> LandmarkHeuristic:
+        if self.landmarks is not None:
+            self.landmarks.detach()
+        self.landmarks = None
+        if cache_file and os.path.exists(cache_file):
+            try:
+                self.landmarks = LandmarkHeuristic.load(cache_file, self.grid)
+            except ValueError:
+                pass
+        if self.landmarks is None:
+            self.landmarks = LandmarkHeuristic(self.grid, count)
+            if cache_file:
+                self.landmarks.save(cache_file)
+        return self.landmarks
+    
+    def landmark_heuristic(self) -> LandmarkHeuristic:
+        landmarks = self.landmarks
+        if landmarks is None or landmarks.grid is not self.grid or landmarks.stale:
+            count = len(landmarks.landmarks) if landmarks is not None else 8
+            landmarks = self.build_landmarks(count)
+        return landmarks
+    
+    def hierarchical_pathfind(self, start: Tuple[int, int], end: Tuple[int, int],
+                              stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int]]]:
+        if self.hierarchy is None or self.hierarchy.grid is not self.grid:
+            self.build_hierarchy()
+        if not self.components.connected(start, end):
+            return None
+        if stats is not None:
+            stats.engine = 'hpa'
+        return self.hierarchy.find_path(tuple(start), tuple(end), stats, self.workspace())
+    
     def get_directions(self, path: List[Tuple[int, int]]) -> List[str]:
         if len(path) < 2:
             return []
         
         directions = []
-        direction_map = {
-            (-1, 0): "UP",
-            (1, 0): "DOWN", 
-            (0, -1): "LEFT",
-            (0, 1): "RIGHT"
-        }
-        
         for i in range(len(path) - 1):
             current = path[i]
             next_pos = path[i + 1]
@@ -139,11 +395,19 @@ class CarPathfinder:
             dr = next_pos[0] - current[0]
             dc = next_pos[1] - current[1]
             
-            direction = direction_map.get((dr, dc), "UNKNOWN")
+            direction = DIRECTION_NAMES.get((dr, dc), "UNKNOWN")
             directions.append(direction)
         
         return directions
     
+    def get_instructions(self, path) -> List[str]:
+        # One instruction per straight run, e.g. "RIGHT x42".
+        if not path:
+            return []
+        if not isinstance(path, CompactPath):
+            path = CompactPath.from_cells(path)
+        return path.instructions()
+    
     def get_user_input(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
         print(f"Grid dimensions: {self.rows} rows x {self.cols} columns")
         print("Enter coordinates as (row, column) where (0,0) is top-left")
@@ -157,7 +421,7 @@ class CarPathfinder:
                 if not (0 <= start_row < self.rows and 0 <= start_col < self.cols):
                     print("Start position out of bounds!")
                     continue
-                if self.grid[start_row][start_col] == 1:
+                if self.grid.is_blocked(start_row, start_col):
                     print("Start position is blocked!")
                     continue
                 break
@@ -173,7 +437,7 @@ class CarPathfinder:
                 if not (0 <= end_row < self.rows and 0 <= end_col < self.cols):
                     print("End position out of bounds!")
                     continue
-                if self.grid[end_row][end_col] == 1:
+                if self.grid.is_blocked(end_row, end_col):
                     print("End position is blocked!")
                     continue
                 break
@@ -191,27 +455,25 @@ class CarPathfinder:
         start, end = self.get_user_input()
         
         print(f"\nFinding path from {start} to {end}...")
-        path = self.astar_pathfind(start, end)
+        path = self.compact_pathfind(start, end)
         
         if path is None:
             print("No path found! The destination is unreachable.")
             return
         
-        directions = self.get_directions(path)
+        instructions = path.instructions()
         
-        print(f"\nPath found! Length: {len(path)} steps")
+        print(f"\nPath found! Length: {len(path)} steps, {len(instructions)} instructions")
         print("\n=== NAVIGATION INSTRUCTIONS ===")
-        for i, direction in enumerate(directions, 1):
-            print(f"Step {i}: {direction}")
+        print("\n".join(f"Step {i}: {instruction}" for i, instruction in enumerate(instructions, 1)))
         
-        print(f"\n=== PATH COORDINATES ===")
-        for i, pos in enumerate(path):
-            print(f"Step {i}: {pos}")
+        print(f"\n=== WAYPOINTS ===")
+        print("\n".join(f"Waypoint {i}: {pos}" for i, pos in enumerate(path.waypoints())))
         
         print("\n=== VISUALIZATION ===")
         self.visualize_grid(path, start, end)
         
-        return path, directions
+        return path, instructions
 
 def main():
     try:
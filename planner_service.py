@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from map_format import map_shape
+from pathfinding_car import CarPathfinder
+from search_engines import SEARCH_ENGINES
+
+# Newline-delimited JSON over a Unix or TCP socket. Requests:
+#   {"id": 1, "op": "path", "map": "floor2", "start": [r, c], "end": [r, c], "engine": "array"}
+#   {"id": 2, "op": "metrics"}
+#   {"id": 3, "op": "ping"}
+# Every response echoes "id" and carries either a result or "error".
+
+LATENCY_WINDOW = 1000
+
+_worker_pathfinders: Dict[str, CarPathfinder] = {}
+
+def _init_worker(maps: Dict[str, str]):
+    # Each worker process loads every map once and keeps it (and its route
+    # cache) warm for its whole lifetime.
+    for name, filename in maps.items():
+        _worker_pathfinders[name] = CarPathfinder(filename)
+
+def _solve(map_name: str, start: Tuple[int, int], end: Tuple[int, int],
+           engine: Optional[str]) -> Optional[List[Tuple[int, int]]]:
+    return _worker_pathfinders[map_name].astar_pathfind(start, end, engine)
+
+class ServiceMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.searches = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.queue_depth = 0
+        self.peak_queue_depth = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.started = time.monotonic()
+    
+    def enter_queue(self):
+        self.queue_depth += 1
+        if self.queue_depth > self.peak_queue_depth:
+            self.peak_queue_depth = self.queue_depth
+    
+    def leave_queue(self):
+        self.queue_depth -= 1
+    
+    def snapshot(self) -> dict:
+        latencies = sorted(self.latencies)
+        def percentile(fraction: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(int(round(fraction * (len(latencies) - 1))), len(latencies) - 1)] * 1000
+        return {
+            'uptime_seconds': round(time.monotonic() - self.started, 3),
+            'requests': self.requests,
+            'searches': self.searches,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'queue_depth': self.queue_depth,
+            'peak_queue_depth': self.peak_queue_depth,
+            'latency_ms': {
+                'p50': round(percentile(0.50), 3),
+                'p90': round(percentile(0.90), 3),
+                'p99': round(percentile(0.99), 3),
+                'max': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            },
+        }
+
+class PlannerService:
+    def __init__(self, maps: Dict[str, str], workers: Optional[int] = None, max_queue: int = 256):
+        if not maps:
+            raise ValueError("At least one map is required")
+        self.maps = dict(maps)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.metrics = ServiceMetrics()
+        self.shapes = {}
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self._slots = None
+        self._executor = None
+        self._server = None
+        self._connections = {}
+    
+    async def start(self, unix_path: Optional[str] = None, host: str = '127.0.0.1', port: int = 8765):
+        for name, filename in self.maps.items():
+            self.shapes[name] = map_shape(filename)
+        self._slots = asyncio.Semaphore(self.max_queue)
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.maps,))
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+    
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+    
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # Closing the transports makes every connection handler see EOF,
+            # finish its outstanding requests and return.
+            for writer in list(self._connections.values()):
+                writer.close()
+            if self._connections:
+                await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Backpressure: a request only leaves the socket once a queue slot is
+        # free, so a flooding client stalls on its own send buffer instead of
+        # growing the service's memory.
+        write_lock = asyncio.Lock()
+        tasks = set()
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                await self._slots.acquire()
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    line = b''
+                if not line:
+                    self._slots.release()
+                    break
+                task = asyncio.ensure_future(self._serve_request(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+            self._connections.pop(asyncio.current_task(), None)
+    
+    async def _serve_request(self, line: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        self.metrics.enter_queue()
+        started = time.perf_counter()
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = await self.handle_request(request)
+        except Exception as e:
+            self.metrics.errors += 1
+            response = {'error': str(e)}
+        finally:
+            self.metrics.leave_queue()
+            self._slots.release()
+        self.metrics.latencies.append(time.perf_counter() - started)
+        response['id'] = request_id
+        async with write_lock:
+            if writer.is_closing():
+                return
+            writer.write(json.dumps(response).encode() + b'\n')
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+    
+    async def handle_request(self, request: dict) -> dict:
+        self.metrics.requests += 1
+        op = request.get('op', 'path')
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'metrics':
+            return {'metrics': self.metrics.snapshot()}
+        if op != 'path':
+            raise ValueError(f"Unknown op: {op}")
+        
+        map_name = request.get('map') or next(iter(self.maps))
+        if map_name not in self.maps:
+            raise ValueError(f"Unknown map: {map_name}")
+        engine = request.get('engine')
+        if engine is not None and engine not in ('reference', 'alt') and engine not in SEARCH_ENGINES:
+            raise ValueError(f"Unknown search engine: {engine}")
+        rows, cols = self.shapes[map_name]
+        start = tuple(int(value) for value in request['start'])
+        end = tuple(int(value) for value in request['end'])
+        for row, col in (start, end):
+            if not (0 <= row < rows and 0 <= col < cols):
+                raise ValueError(f"Position {(row, col)} is outside the {rows}x{cols} map")
+        
+        path = await self.find_path(map_name, start, end, engine)
+        return {'path': path, 'length': len(path) if path else 0}
+    
+    async def find_path(self, map_name: str, start: Tuple[int, int], end: Tuple[int, int],
+                        engine: Optional[str] = None) -> Optional[List[List[int]]]:
+        # Identical queries that arrive while one is already being searched
+        # wait on the same future instead of starting another search.
+        key = (map_name, start, end, engine)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.metrics.coalesced += 1
+            return await asyncio.shield(future)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, _solve, map_name, start, end, engine)
+        self._in_flight[key] = future
+        self.metrics.searches += 1
+        try:
+            path = await asyncio.shield(future)
+        finally:
+            self._in_flight.pop(key, None)
+        return [list(position) for position in path] if path else None
+
+class PlannerClient:
+    def __init__(self, unix_path: Optional[str] = None, host: str = '127.0.0.1', port: int = 8765):
+        self.unix_path = unix_path
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._reader_task = None
+    
+    async def connect(self):
+        if self.unix_path:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.unix_path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._reader_task = asyncio.ensure_future(self._read_responses())
+        return self
+    
+    async def __aenter__(self) -> 'PlannerClient':
+        return await self.connect()
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+    
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+    
+    async def _read_responses(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._pending.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Planner service closed the connection"))
+        self._pending.clear()
+    
+    async def request(self, payload: dict) -> dict:
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(json.dumps(dict(payload, id=request_id)).encode() + b'\n')
+        await self._writer.drain()
+        response = await future
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return response
+    
+    async def find_path(self, start: Tuple[int, int], end: Tuple[int, int], map_name: Optional[str] = None,
+                        engine: Optional[str] = None) -> Optional[List[Tuple[int, int]]]:
+        payload = {'op': 'path', 'start': list(start), 'end': list(end)}
+        if map_name:
+            payload['map'] = map_name
+        if engine:
+            payload['engine'] = engine
+        response = await self.request(payload)
+        return [tuple(position) for position in response['path']] if response['path'] else None
+    
+    async def metrics(self) -> dict:
+        return (await self.request({'op': 'metrics'}))['metrics']
+
+def parse_maps(specs: List[str]) -> Dict[str, str]:
+    maps = {}
+    for spec in specs:
+        name, _, filename = spec.partition('=')
+        if not filename:
+            filename = name
+            name = os.path.splitext(os.path.basename(filename))[0]
+        maps[name] = filename
+    return maps
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve path queries over a local socket.")
+    parser.add_argument('--map', action='append', default=[], metavar='NAME=FILE',
+                        help="map to keep loaded (repeatable); defaults to floor2=floor2.csv")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-queue', type=int, default=256,
+                        help="requests accepted before the service stops reading from sockets")
+    args = parser.parse_args()
+    
+    service = PlannerService(parse_maps(args.map or ['floor2=floor2.csv']), args.workers, args.max_queue)
+    
+    async def run():
+        await service.start(args.unix, args.host, args.port)
+        where = args.unix or f"{args.host}:{args.port}"
+        print(f"Planner service listening on {where} with {service.workers} workers, maps: {', '.join(service.maps)}")
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+    
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import List, Tuple, Optional
+
+MISS = object()
+
+class RouteCache:
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.version = None
+        self._routes = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def _check_version(self, version: int):
+        # Entries are keyed by grid version; once the grid moves on they can
+        # never hit again, so drop them instead of waiting for LRU eviction.
+        if version != self.version:
+            self._routes.clear()
+            self.version = version
+
+    def get(self, start: Tuple[int, int], end: Tuple[int, int], version: int, weighted: bool = False):
+        # weighted separates cost-aware routes from fewest-cell routes; on a
+        # weighted map the two generally differ.
+        self._check_version(version)
+        key = (start, end, version, weighted)
+        if key in self._routes:
+            self._routes.move_to_end(key)
+            self.hits += 1
+            route = self._routes[key]
+            return list(route) if route is not None else None
+
+        reverse_key = (end, start, version, weighted)
+        if reverse_key in self._routes:
+            self._routes.move_to_end(reverse_key)
+            self.hits += 1
+            route = self._routes[reverse_key]
+            return list(reversed(route)) if route is not None else None
+
+        self.misses += 1
+        return MISS
+
+    def put(self, start: Tuple[int, int], end: Tuple[int, int], version: int,
+            path: Optional[List[Tuple[int, int]]], weighted: bool = False):
+        if self.max_entries <= 0:
+            return
+        self._check_version(version)
+        key = (start, end, version, weighted)
+        self._routes[key] = tuple(path) if path is not None else None
+        self._routes.move_to_end(key)
+        while len(self._routes) > self.max_entries:
+            self._routes.popitem(last=False)
+
+    def invalidate(self):
+        self._routes.clear()
+        self.version = None
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,568 @@
+import heapq
+from array import array
+import numpy as np
+from typing import Callable, List, Tuple, Optional
+from occupancy_grid import COST_TABLE, MASK_STEPS, MAX_COST, NEIGHBOR_STEPS, OBSTACLE, build_neighbor_masks
+
+# Successor order matches CarPathfinder.get_neighbors: right, down, left, up.
+STEPS = NEIGHBOR_STEPS
+
+class SearchStats:
+    # Counters accumulate over every search the object is passed to, so one
+    # instance can aggregate a whole batch of queries. Expansion hooks are
+    # called as hook(row, col) for every expanded cell.
+    def __init__(self, engine: str = '', hooks: Optional[List[Callable[[int, int], None]]] = None):
+        self.engine = engine
+        self.searches = 0
+        self.nodes_expanded = 0
+        self.heap_pushes = 0
+        self.heap_pops = 0
+        self.peak_open = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rejected = 0
+        self.elapsed_seconds = 0.0
+        self.engines = {}
+        self.hooks = list(hooks or ())
+    
+    def add_hook(self, hook: Callable[[int, int], None]):
+        self.hooks.append(hook)
+    
+    def remove_hook(self, hook: Callable[[int, int], None]):
+        self.hooks.remove(hook)
+    
+    def expansion_hook(self) -> Optional[Callable[[int, int], None]]:
+        hooks = self.hooks
+        if not hooks:
+            return None
+        if len(hooks) == 1:
+            return hooks[0]
+        def dispatch(row: int, col: int):
+            for hook in hooks:
+                hook(row, col)
+        return dispatch
+    
+    def record_search(self, expanded: int, pushes: int = 0, pops: int = 0, peak_open: int = 0):
+        self.nodes_expanded += expanded
+        self.heap_pushes += pushes
+        self.heap_pops += pops
+        if peak_open > self.peak_open:
+            self.peak_open = peak_open
+    
+    def merge(self, other: 'SearchStats'):
+        self.searches += other.searches
+        self.nodes_expanded += other.nodes_expanded
+        self.heap_pushes += other.heap_pushes
+        self.heap_pops += other.heap_pops
+        self.peak_open = max(self.peak_open, other.peak_open)
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.rejected += other.rejected
+        self.elapsed_seconds += other.elapsed_seconds
+        for engine, count in other.engines.items():
+            self.engines[engine] = self.engines.get(engine, 0) + count
+    
+    def as_dict(self) -> dict:
+        return {
+            'engine': self.engine,
+            'searches': self.searches,
+            'nodes_expanded': self.nodes_expanded,
+            'heap_pushes': self.heap_pushes,
+            'heap_pops': self.heap_pops,
+            'peak_open': self.peak_open,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'rejected': self.rejected,
+            'elapsed_seconds': self.elapsed_seconds,
+            'engines': dict(self.engines),
+        }
+    
+    def __repr__(self):
+        return (f"SearchStats(engine={self.engine!r}, searches={self.searches}, "
+                f"nodes_expanded={self.nodes_expanded}, heap_pushes={self.heap_pushes}, "
+                f"heap_pops={self.heap_pops}, peak_open={self.peak_open}, "
+                f"cache_hits={self.cache_hits}, cache_misses={self.cache_misses}, "
+                f"elapsed_seconds={self.elapsed_seconds:.6f})")
+
+class SearchWorkspace:
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        size = rows * cols
+        self.g_cost = array('l', bytes(array('l').itemsize * size))
+        self.parent = array('l', bytes(array('l').itemsize * size))
+        self.seen = array('L', bytes(array('L').itemsize * size))
+        self.closed = array('L', bytes(array('L').itemsize * size))
+        self.g_cost_reverse = None
+        self.parent_reverse = None
+        self.generation = 0
+    
+    def reverse_buffers(self):
+        if self.g_cost_reverse is None:
+            size = self.rows * self.cols
+            self.g_cost_reverse = array('l', bytes(array('l').itemsize * size))
+            self.parent_reverse = array('l', bytes(array('l').itemsize * size))
+        return self.g_cost_reverse, self.parent_reverse
+    
+    def next_generation(self) -> int:
+        # Stamping cells with the search generation avoids clearing the
+        # buffers between queries; a wrap-around resets them once.
+        self.generation += 1
+        if self.generation >= 0xFFFFFFFF:
+            size = self.rows * self.cols
+            self.seen = array('L', bytes(array('L').itemsize * size))
+            self.closed = array('L', bytes(array('L').itemsize * size))
+            self.generation = 1
+        return self.generation
+
+def reusable_workspace(workspace: Optional[SearchWorkspace], rows: int, cols: int) -> SearchWorkspace:
+    # Keeps a caller's buffers across queries, replacing them only when the
+    # grid shape changes.
+    if workspace is None or (workspace.rows, workspace.cols) != (rows, cols):
+        workspace = SearchWorkspace(rows, cols)
+    return workspace
+
+def flat_cells(cells: np.ndarray) -> memoryview:
+    return memoryview(np.ascontiguousarray(cells, dtype=np.uint8).reshape(-1))
+
+def neighbor_moves(cols: int) -> List[Tuple[Tuple[int, int, int], ...]]:
+    # For every neighbor mask, its successors as (dr, dc, flat offset). With
+    # the mask table an expansion needs no bounds checks or grid lookups.
+    return [tuple((dr, dc, dr * cols + dc) for dr, dc in steps) for steps in MASK_STEPS]
+
+def flat_masks(cells: np.ndarray, masks: Optional[np.ndarray] = None) -> memoryview:
+    # Engines take the grid's maintained table when the caller has one and
+    # build a throwaway table otherwise.
+    return flat_cells(build_neighbor_masks(cells) if masks is None else masks)
+
+def reconstruct_path(parent, start_idx: int, end_idx: int, cols: int) -> List[Tuple[int, int]]:
+    path = []
+    idx = end_idx
+    while idx != start_idx:
+        path.append(divmod(idx, cols))
+        idx = parent[idx]
+    path.append(divmod(start_idx, cols))
+    return path[::-1]
+
+def bfs_distances(cells: np.ndarray, source: Tuple[int, int]) -> np.ndarray:
+    # Wavefront BFS on flat indices: each layer is expanded with a handful of
+    # vectorized operations, so the Python loop runs once per distance level.
+    rows, cols = cells.shape
+    passable = (cells != OBSTACLE).reshape(-1)
+    distances = np.full(rows * cols, -1, dtype=np.int32)
+    source_idx = source[0] * cols + source[1]
+    if not passable[source_idx]:
+        return distances.reshape(rows, cols)
+    distances[source_idx] = 0
+    frontier = np.array([source_idx], dtype=np.int64)
+    level = 0
+    while frontier.size:
+        level += 1
+        frontier_cols = frontier % cols
+        candidates = np.concatenate((
+            frontier[frontier_cols < cols - 1] + 1,
+            frontier[frontier < (rows - 1) * cols] + cols,
+            frontier[frontier_cols > 0] - 1,
+            frontier[frontier >= cols] - cols,
+        ))
+        candidates = candidates[passable[candidates] & (distances[candidates] < 0)]
+        frontier = np.unique(candidates)
+        distances[frontier] = level
+    return distances.reshape(rows, cols)
+
+def astar_array(cells: np.ndarray, start: Tuple[int, int], end: Tuple[int, int],
+                workspace: Optional[SearchWorkspace] = None,
+                stats: Optional[SearchStats] = None,
+                heuristic: Optional[Callable[[int], int]] = None,
+                masks: Optional[np.ndarray] = None) -> Optional[List[Tuple[int, int]]]:
+    rows, cols = cells.shape
+    mask_of = flat_masks(cells, masks)
+    moves = neighbor_moves(cols)
+    if workspace is None or (workspace.rows, workspace.cols) != (rows, cols):
+        workspace = SearchWorkspace(rows, cols)
+    generation = workspace.next_generation()
+    g_cost = workspace.g_cost
+    parent = workspace.parent
+    seen = workspace.seen
+    closed = workspace.closed
+    
+    start_idx = start[0] * cols + start[1]
+    end_idx = end[0] * cols + end[1]
+    end_row, end_col = end
+    
+    if heuristic is None:
+        h = abs(start[0] - end_row) + abs(start[1] - end_col)
+    else:
+        h = heuristic(start_idx)
+    g_cost[start_idx] = 0
+    seen[start_idx] = generation
+    open_list = [(h, h, start_idx)]
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    on_expand = stats.expansion_hook() if stats is not None else None
+    expanded = 0
+    pushes = 1
+    pops = 0
+    peak_open = 1
+    
+    while open_list:
+        _, _, idx = heappop(open_list)
+        pops += 1
+        if idx == end_idx:
+            if stats is not None:
+                stats.record_search(expanded, pushes, pops, peak_open)
+            return reconstruct_path(parent, start_idx, end_idx, cols)
+        if closed[idx] == generation:
+            continue
+        closed[idx] = generation
+        expanded += 1
+        
+        row, col = divmod(idx, cols)
+        if on_expand is not None:
+            on_expand(row, col)
+        tentative_g = g_cost[idx] + 1
+        for dr, dc, offset in moves[mask_of[idx]]:
+            neighbor = idx + offset
+            if closed[neighbor] == generation:
+                continue
+            if seen[neighbor] != generation or tentative_g < g_cost[neighbor]:
+                seen[neighbor] = generation
+                g_cost[neighbor] = tentative_g
+                parent[neighbor] = idx
+                if heuristic is None:
+                    h = abs(row + dr - end_row) + abs(col + dc - end_col)
+                else:
+                    h = heuristic(neighbor)
+                heappush(open_list, (tentative_g + h, h, neighbor))
+                pushes += 1
+        if len(open_list) > peak_open:
+            peak_open = len(open_list)
+    
+    if stats is not None:
+        stats.record_search(expanded, pushes, pops, peak_open)
+    return None
+
+def _jump_vertical(masks, cols: int, row: int, col: int, dr: int,
+                   end_row: int, end_col: int) -> int:
+    # Mask bits: 1 right, 2 down, 4 left, 8 up. A side cell that is open here
+    # but closed one step back marks a forced neighbour.
+    forward = 2 if dr > 0 else 8
+    stride = dr * cols
+    idx = row * cols + col
+    while True:
+        if not masks[idx] & forward:
+            return -1
+        row += dr
+        idx += stride
+        if row == end_row and col == end_col:
+            return idx
+        mask = masks[idx]
+        behind = masks[idx - stride]
+        if mask & 4 and not behind & 4:
+            return idx
+        if mask & 1 and not behind & 1:
+            return idx
+
+def _jump_horizontal(masks, cols: int, row: int, col: int, dc: int,
+                     end_row: int, end_col: int) -> int:
+    forward = 1 if dc > 0 else 4
+    idx = row * cols + col
+    while True:
+        if not masks[idx] & forward:
+            return -1
+        col += dc
+        idx += dc
+        if row == end_row and col == end_col:
+            return idx
+        if (_jump_vertical(masks, cols, row, col, 1, end_row, end_col) >= 0 or
+                _jump_vertical(masks, cols, row, col, -1, end_row, end_col) >= 0):
+            return idx
+
+def expand_jump_points(jump_points: List[int], cols: int) -> List[Tuple[int, int]]:
+    path = [divmod(jump_points[0], cols)]
+    for idx in jump_points[1:]:
+        row, col = path[-1]
+        end_row, end_col = divmod(idx, cols)
+        dr = (end_row > row) - (end_row < row)
+        dc = (end_col > col) - (end_col < col)
+        while (row, col) != (end_row, end_col):
+            row += dr
+            col += dc
+            path.append((row, col))
+    return path
+
+def jump_point_search(cells: np.ndarray, start: Tuple[int, int], end: Tuple[int, int],
+                      workspace: Optional[SearchWorkspace] = None,
+                      stats: Optional[SearchStats] = None,
+                      masks: Optional[np.ndarray] = None) -> Optional[List[Tuple[int, int]]]:
+    # 4-connected JPS with a horizontal-first canonical ordering: horizontal
+    # jumps probe both vertical directions at every step, vertical jumps stop
+    # only where a side cell opens up behind an obstacle corner.
+    rows, cols = cells.shape
+    mask_of = flat_masks(cells, masks)
+    if workspace is None or (workspace.rows, workspace.cols) != (rows, cols):
+        workspace = SearchWorkspace(rows, cols)
+    generation = workspace.next_generation()
+    g_cost = workspace.g_cost
+    parent = workspace.parent
+    seen = workspace.seen
+    closed = workspace.closed
+    
+    start_idx = start[0] * cols + start[1]
+    end_idx = end[0] * cols + end[1]
+    end_row, end_col = end
+    
+    h = abs(start[0] - end_row) + abs(start[1] - end_col)
+    g_cost[start_idx] = 0
+    seen[start_idx] = generation
+    open_list = [(h, h, start_idx)]
+    on_expand = stats.expansion_hook() if stats is not None else None
+    expanded = 0
+    pushes = 1
+    pops = 0
+    peak_open = 1
+    
+    while open_list:
+        _, _, idx = heapq.heappop(open_list)
+        pops += 1
+        if idx == end_idx:
+            if stats is not None:
+                stats.record_search(expanded, pushes, pops, peak_open)
+            jump_points = [idx]
+            while idx != start_idx:
+                idx = parent[idx]
+                jump_points.append(idx)
+            return expand_jump_points(jump_points[::-1], cols)
+        if closed[idx] == generation:
+            continue
+        closed[idx] = generation
+        expanded += 1
+        
+        row, col = divmod(idx, cols)
+        if on_expand is not None:
+            on_expand(row, col)
+        if idx == start_idx:
+            successors = STEPS
+        else:
+            p_row, p_col = divmod(parent[idx], cols)
+            dr = (row > p_row) - (row < p_row)
+            dc = (col > p_col) - (col < p_col)
+            if dc:
+                successors = ((0, dc), (1, 0), (-1, 0))
+            else:
+                successors = [(dr, 0)]
+                mask = mask_of[idx]
+                behind = mask_of[idx - dr * cols]
+                if mask & 4 and not behind & 4:
+                    successors.append((0, -1))
+                if mask & 1 and not behind & 1:
+                    successors.append((0, 1))
+        
+        for dr, dc in successors:
+            if dc:
+                jump = _jump_horizontal(mask_of, cols, row, col, dc, end_row, end_col)
+            else:
+                jump = _jump_vertical(mask_of, cols, row, col, dr, end_row, end_col)
+            if jump < 0 or closed[jump] == generation:
+                continue
+            j_row, j_col = divmod(jump, cols)
+            tentative_g = g_cost[idx] + abs(j_row - row) + abs(j_col - col)
+            if seen[jump] != generation or tentative_g < g_cost[jump]:
+                seen[jump] = generation
+                g_cost[jump] = tentative_g
+                parent[jump] = idx
+                h = abs(j_row - end_row) + abs(j_col - end_col)
+                heapq.heappush(open_list, (tentative_g + h, h, jump))
+                pushes += 1
+        if len(open_list) > peak_open:
+            peak_open = len(open_list)
+    
+    if stats is not None:
+        stats.record_search(expanded, pushes, pops, peak_open)
+    return None
+
+def bidirectional_search(cells: np.ndarray, start: Tuple[int, int], end: Tuple[int, int],
+                         workspace: Optional[SearchWorkspace] = None,
+                         stats: Optional[SearchStats] = None,
+                         masks: Optional[np.ndarray] = None) -> Optional[List[Tuple[int, int]]]:
+    # Layered bidirectional BFS. Each round expands one whole layer of the
+    # smaller frontier; a meeting is recorded whenever an edge reaches a cell
+    # the other side has seen. Once a layer produces any meeting, the cheapest
+    # meeting of that layer is a shortest path, so the search stops there.
+    rows, cols = cells.shape
+    mask_of = flat_masks(cells, masks)
+    moves = neighbor_moves(cols)
+    if workspace is None or (workspace.rows, workspace.cols) != (rows, cols):
+        workspace = SearchWorkspace(rows, cols)
+    generation = workspace.next_generation()
+    forward_cost, forward_parent, forward_seen = workspace.g_cost, workspace.parent, workspace.seen
+    backward_cost, backward_parent = workspace.reverse_buffers()
+    backward_seen = workspace.closed
+    
+    start_idx = start[0] * cols + start[1]
+    end_idx = end[0] * cols + end[1]
+    if start_idx == end_idx:
+        return [tuple(start)]
+    forward_seen[start_idx] = generation
+    forward_cost[start_idx] = 0
+    backward_seen[end_idx] = generation
+    backward_cost[end_idx] = 0
+    forward_frontier = [start_idx]
+    backward_frontier = [end_idx]
+    on_expand = stats.expansion_hook() if stats is not None else None
+    expanded = 0
+    pushes = 2
+    peak_open = 2
+    
+    while forward_frontier and backward_frontier:
+        forward = len(forward_frontier) <= len(backward_frontier)
+        if forward:
+            frontier, cost, parent, seen = forward_frontier, forward_cost, forward_parent, forward_seen
+            other_cost, other_seen = backward_cost, backward_seen
+        else:
+            frontier, cost, parent, seen = backward_frontier, backward_cost, backward_parent, backward_seen
+            other_cost, other_seen = forward_cost, forward_seen
+        
+        next_frontier = []
+        best_cost = -1
+        meeting = None
+        for idx in frontier:
+            expanded += 1
+            row, col = divmod(idx, cols)
+            if on_expand is not None:
+                on_expand(row, col)
+            next_cost = cost[idx] + 1
+            for _, _, offset in moves[mask_of[idx]]:
+                neighbor = idx + offset
+                if other_seen[neighbor] == generation:
+                    total = next_cost + other_cost[neighbor]
+                    if meeting is None or total < best_cost:
+                        best_cost = total
+                        meeting = (idx, neighbor) if forward else (neighbor, idx)
+                if seen[neighbor] == generation:
+                    continue
+                seen[neighbor] = generation
+                cost[neighbor] = next_cost
+                parent[neighbor] = idx
+                next_frontier.append(neighbor)
+                pushes += 1
+        
+        open_size = len(next_frontier) + len(backward_frontier if forward else forward_frontier)
+        if open_size > peak_open:
+            peak_open = open_size
+        if meeting is not None:
+            if stats is not None:
+                stats.record_search(expanded, pushes, expanded, peak_open)
+            forward_end, backward_start = meeting
+            path = reconstruct_path(forward_parent, start_idx, forward_end, cols)
+            idx = backward_start
+            path.append(divmod(idx, cols))
+            while idx != end_idx:
+                idx = backward_parent[idx]
+                path.append(divmod(idx, cols))
+            return path
+        
+        if forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+    
+    if stats is not None:
+        stats.record_search(expanded, pushes, expanded, peak_open)
+    return None
+
+def dial_search(cells: np.ndarray, start: Tuple[int, int], end: Tuple[int, int],
+                workspace: Optional[SearchWorkspace] = None,
+                stats: Optional[SearchStats] = None,
+                min_cost: int = 1, max_cost: int = MAX_COST,
+                masks: Optional[np.ndarray] = None) -> Optional[List[Tuple[int, int]]]:
+    # Cost-weighted A* over a bucket queue (Dial's algorithm). Entering a cell
+    # costs COST_TABLE[value] and the heuristic is Manhattan distance times
+    # min_cost, which stays admissible and consistent as long as min_cost is
+    # the cheapest cell on the map. f then never decreases and never grows
+    # by more than max_cost + min_cost per step, so a ring of that many
+    # buckets replaces the heap: pushes and pops are list appends and pops.
+    rows, cols = cells.shape
+    grid = flat_cells(cells)
+    mask_of = flat_masks(cells, masks)
+    moves = neighbor_moves(cols)
+    if workspace is None or (workspace.rows, workspace.cols) != (rows, cols):
+        workspace = SearchWorkspace(rows, cols)
+    generation = workspace.next_generation()
+    g_cost = workspace.g_cost
+    parent = workspace.parent
+    seen = workspace.seen
+    closed = workspace.closed
+    costs = COST_TABLE
+    
+    start_idx = start[0] * cols + start[1]
+    end_idx = end[0] * cols + end[1]
+    end_row, end_col = end
+    
+    ring = max_cost + min_cost + 1
+    buckets = [[] for _ in range(ring)]
+    f = min_cost * (abs(start[0] - end_row) + abs(start[1] - end_col))
+    g_cost[start_idx] = 0
+    seen[start_idx] = generation
+    buckets[f % ring].append(start_idx)
+    open_count = 1
+    on_expand = stats.expansion_hook() if stats is not None else None
+    expanded = 0
+    pushes = 1
+    pops = 0
+    peak_open = 1
+    
+    while open_count:
+        bucket = buckets[f % ring]
+        while not bucket:
+            f += 1
+            bucket = buckets[f % ring]
+        idx = bucket.pop()
+        open_count -= 1
+        pops += 1
+        if idx == end_idx:
+            if stats is not None:
+                stats.record_search(expanded, pushes, pops, peak_open)
+            return reconstruct_path(parent, start_idx, end_idx, cols)
+        if closed[idx] == generation:
+            continue
+        closed[idx] = generation
+        expanded += 1
+        
+        row, col = divmod(idx, cols)
+        if on_expand is not None:
+            on_expand(row, col)
+        g = g_cost[idx]
+        for dr, dc, offset in moves[mask_of[idx]]:
+            neighbor = idx + offset
+            if closed[neighbor] == generation:
+                continue
+            tentative_g = g + costs[grid[neighbor]]
+            if seen[neighbor] != generation or tentative_g < g_cost[neighbor]:
+                seen[neighbor] = generation
+                g_cost[neighbor] = tentative_g
+                parent[neighbor] = idx
+                next_f = tentative_g + min_cost * (abs(row + dr - end_row) + abs(col + dc - end_col))
+                buckets[next_f % ring].append(neighbor)
+                open_count += 1
+                pushes += 1
+        if open_count > peak_open:
+            peak_open = open_count
+    
+    if stats is not None:
+        stats.record_search(expanded, pushes, pops, peak_open)
+    return None
+
+def path_cost(cells: np.ndarray, path: List[Tuple[int, int]]) -> int:
+    # Total cost of the cells entered along the path (the start is free).
+    return sum(COST_TABLE[cells[row, col]] for row, col in path[1:])
+
+SEARCH_ENGINES = {
+    'array': astar_array,
+    'jps': jump_point_search,
+    'bidirectional': bidirectional_search,
+    'dial': dial_search,
+}
+
+# Engines that honour cell costs; the others treat every passable cell as cost 1.
+WEIGHTED_ENGINES = ('dial',)
@@ -0,0 +1,135 @@
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+class ExpansionHeatmap:
+    # Expansion hook that counts expanded cells per region_size x region_size
+    # block. Attach it to a SearchStats that is reused across queries to see
+    # which parts of the map searches spend their time in.
+    def __init__(self, rows: int, cols: int, region_size: int = 16):
+        if region_size < 1:
+            raise ValueError("region_size must be at least 1")
+        self.rows = rows
+        self.cols = cols
+        self.region_size = region_size
+        self.region_rows = -(-rows // region_size)
+        self.region_cols = -(-cols // region_size)
+        self.counts = [0] * (self.region_rows * self.region_cols)
+        self.total = 0
+    
+    def __call__(self, row: int, col: int):
+        self.counts[(row // self.region_size) * self.region_cols + col // self.region_size] += 1
+        self.total += 1
+    
+    def clear(self):
+        self.counts = [0] * (self.region_rows * self.region_cols)
+        self.total = 0
+    
+    def region_bounds(self, region: int) -> Tuple[int, int, int, int]:
+        region_row, region_col = divmod(region, self.region_cols)
+        row0 = region_row * self.region_size
+        col0 = region_col * self.region_size
+        return row0, min(row0 + self.region_size, self.rows), col0, min(col0 + self.region_size, self.cols)
+    
+    def hottest(self, count: int = 10) -> List[Tuple[Tuple[int, int, int, int], int]]:
+        ranked = sorted(range(len(self.counts)), key=self.counts.__getitem__, reverse=True)
+        return [(self.region_bounds(region), self.counts[region]) for region in ranked[:count]
+                if self.counts[region]]
+    
+    def report(self, count: int = 10) -> str:
+        lines = [f"{'Rows':>13}  {'Cols':>13}  {'Expanded':>10}  {'Share':>6}"]
+        for (row0, row1, col0, col1), expanded in self.hottest(count):
+            share = 100 * expanded / self.total if self.total else 0.0
+            lines.append(f"{row0:>6}-{row1 - 1:<6}  {col0:>6}-{col1 - 1:<6}  {expanded:>10}  {share:>5.1f}%")
+        return "\n".join(lines)
+
+class SamplingProfiler:
+    # Statistical profiler: a background thread periodically looks at the
+    # innermost frame of every thread currently inside a sampling() block and
+    # counts (file, function, line). The searching thread pays nothing beyond
+    # registering itself. Samples are only taken when the sampler gets the
+    # GIL, so the effective rate is bounded by sys.getswitchinterval().
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples = Counter()
+        self.functions = Counter()
+        self.total_samples = 0
+        self._targets = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+    
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='search-profiler', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+    
+    def __enter__(self) -> 'SamplingProfiler':
+        self.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    @contextmanager
+    def sampling(self) -> Iterator[None]:
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._targets[thread_id] = self._targets.get(thread_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._targets[thread_id] -= 1
+                if not self._targets[thread_id]:
+                    del self._targets[thread_id]
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                targets = list(self._targets)
+            if not targets:
+                continue
+            frames = sys._current_frames()
+            for thread_id in targets:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                line = frame.f_lineno or code.co_firstlineno
+                self.samples[(filename, code.co_name, line)] += 1
+                self.functions[(filename, code.co_name)] += 1
+                self.total_samples += 1
+    
+    def clear(self):
+        self.samples.clear()
+        self.functions.clear()
+        self.total_samples = 0
+    
+    def report(self, count: int = 10) -> str:
+        total = self.total_samples or 1
+        lines = [f"{self.total_samples} samples", f"{'Samples':>8}  {'Share':>6}  Function"]
+        for (filename, function), samples in self.functions.most_common(count):
+            lines.append(f"{samples:>8}  {100 * samples / total:>5.1f}%  {filename}:{function}")
+        lines.append("")
+        lines.append(f"{'Samples':>8}  {'Share':>6}  Line")
+        for (filename, function, line), samples in self.samples.most_common(count):
+            lines.append(f"{samples:>8}  {100 * samples / total:>5.1f}%  {filename}:{line} ({function})")
+        return "\n".join(lines)
@@ -0,0 +1,219 @@
+import heapq
+import os
+import struct
+import sys
+from collections import OrderedDict
+import numpy as np
+from typing import List, Tuple, Optional
+from occupancy_grid import OBSTACLE
+from search_engines import STEPS, SearchStats
+
+# Header: magic, format version, tile size, rows, cols. Tiles follow in
+# row-major tile order, each stored as one contiguous tile_size x tile_size
+# block; tiles on the right/bottom edge are padded with obstacles.
+MAGIC = b'OGTL'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+
+def write_tiled_map(cells: np.ndarray, filename: str, tile_size: int = 256):
+    # Works one band of tile rows at a time, so a memory-mapped source is
+    # never pulled into memory as a whole.
+    if not 1 <= tile_size <= 0xFFFF:
+        raise ValueError("tile_size must be between 1 and 65535")
+    rows, cols = cells.shape
+    tile_rows = -(-rows // tile_size)
+    tile_cols = -(-cols // tile_size)
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, tile_size, rows, cols))
+        for tile_row in range(tile_rows):
+            row0 = tile_row * tile_size
+            band = np.full((tile_size, tile_cols * tile_size), OBSTACLE, dtype=np.uint8)
+            source = cells[row0:row0 + tile_size]
+            band[:source.shape[0], :cols] = source
+            tiles = band.reshape(tile_size, tile_cols, tile_size).transpose(1, 0, 2)
+            file.write(np.ascontiguousarray(tiles).tobytes())
+
+class TiledMap:
+    def __init__(self, filename: str, max_bytes: int = 64 * 1024 * 1024):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        header = self._file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            self._file.close()
+            raise ValueError(f"{filename} is too short to be a tiled map")
+        magic, version, tile_size, rows, cols = HEADER.unpack(header)
+        if magic != MAGIC or version > FORMAT_VERSION:
+            self._file.close()
+            raise ValueError(f"{filename} is not a supported tiled map")
+        self.tile_size = tile_size
+        self.rows = rows
+        self.cols = cols
+        self.tile_rows = -(-rows // tile_size)
+        self.tile_cols = -(-cols // tile_size)
+        self.tile_bytes = tile_size * tile_size
+        expected = HEADER.size + self.tile_rows * self.tile_cols * self.tile_bytes
+        if os.fstat(self._file.fileno()).st_size < expected:
+            self._file.close()
+            raise ValueError(f"{filename} is truncated")
+        # Always keep room for at least one tile, otherwise nothing could load.
+        self.max_bytes = max(max_bytes, self.tile_bytes)
+        self._tiles = OrderedDict()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+    
+    def close(self):
+        self._file.close()
+        self._tiles.clear()
+    
+    def __enter__(self) -> 'TiledMap':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.rows, self.cols
+    
+    @property
+    def cached_bytes(self) -> int:
+        return len(self._tiles) * self.tile_bytes
+    
+    def loaded_tiles(self) -> List[Tuple[int, int]]:
+        return list(self._tiles)
+    
+    def tile(self, tile_row: int, tile_col: int) -> bytes:
+        key = (tile_row, tile_col)
+        data = self._tiles.get(key)
+        if data is not None:
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return data
+        
+        self._file.seek(HEADER.size + (tile_row * self.tile_cols + tile_col) * self.tile_bytes)
+        data = self._file.read(self.tile_bytes)
+        self.loads += 1
+        self._tiles[key] = data
+        while self.cached_bytes > self.max_bytes:
+            self._tiles.popitem(last=False)
+            self.evictions += 1
+        return data
+    
+    def cell(self, row: int, col: int) -> int:
+        tile_row, local_row = divmod(row, self.tile_size)
+        tile_col, local_col = divmod(col, self.tile_size)
+        return self.tile(tile_row, tile_col)[local_row * self.tile_size + local_col]
+    
+    def in_bounds(self, row: int, col: int) -> bool:
+        return 0 <= row < self.rows and 0 <= col < self.cols
+    
+    def is_blocked(self, row: int, col: int) -> bool:
+        return self.cell(row, col) == OBSTACLE
+    
+    def region(self, row0: int, row1: int, col0: int, col1: int) -> np.ndarray:
+        out = np.empty((row1 - row0, col1 - col0), dtype=np.uint8)
+        size = self.tile_size
+        for tile_row in range(row0 // size, -(-row1 // size)):
+            for tile_col in range(col0 // size, -(-col1 // size)):
+                tile = np.frombuffer(self.tile(tile_row, tile_col), dtype=np.uint8).reshape(size, size)
+                r0 = max(row0, tile_row * size)
+                r1 = min(row1, (tile_row + 1) * size)
+                c0 = max(col0, tile_col * size)
+                c1 = min(col1, (tile_col + 1) * size)
+                out[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = \
+                    tile[r0 - tile_row * size:r1 - tile_row * size, c0 - tile_col * size:c1 - tile_col * size]
+        return out
+    
+    def pathfind(self, start: Tuple[int, int], end: Tuple[int, int],
+                 stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int]]]:
+        if not (self.in_bounds(*start) and self.in_bounds(*end)):
+            return None
+        if self.is_blocked(*start) or self.is_blocked(*end):
+            return None
+        if stats is not None:
+            stats.engine = 'tiled'
+        return astar_tiled(self, start, end, stats)
+
+def astar_tiled(tiled: TiledMap, start: Tuple[int, int], end: Tuple[int, int],
+                stats: Optional[SearchStats] = None) -> Optional[List[Tuple[int, int]]]:
+    # Same search and tie-breaking as astar_array, but costs live in dicts
+    # sized by the explored region and cells are read through the tile cache,
+    # so only tiles the frontier actually reaches are ever loaded. Every read
+    # goes through TiledMap.tile(), so no evicted tile is kept alive here and
+    # resident tiles stay within max_bytes.
+    rows, cols = tiled.rows, tiled.cols
+    size = tiled.tile_size
+    start_idx = start[0] * cols + start[1]
+    end_idx = end[0] * cols + end[1]
+    end_row, end_col = end
+    
+    h = abs(start[0] - end_row) + abs(start[1] - end_col)
+    g_cost = {start_idx: 0}
+    parent = {}
+    closed = set()
+    open_list = [(h, h, start_idx)]
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    expanded = 0
+    tile = tiled.tile
+    
+    while open_list:
+        _, _, idx = heappop(open_list)
+        if idx == end_idx:
+            if stats is not None:
+                stats.nodes_expanded += expanded
+            path = [divmod(idx, cols)]
+            while idx != start_idx:
+                idx = parent[idx]
+                path.append(divmod(idx, cols))
+            path.reverse()
+            return path
+        if idx in closed:
+            continue
+        closed.add(idx)
+        expanded += 1
+        
+        row, col = divmod(idx, cols)
+        tentative_g = g_cost[idx] + 1
+        for dr, dc in STEPS:
+            n_row = row + dr
+            n_col = col + dc
+            if not (0 <= n_row < rows and 0 <= n_col < cols):
+                continue
+            neighbor = n_row * cols + n_col
+            if neighbor in closed:
+                continue
+            tile_row, local_row = divmod(n_row, size)
+            tile_col, local_col = divmod(n_col, size)
+            if tile(tile_row, tile_col)[local_row * size + local_col] == OBSTACLE:
+                continue
+            if tentative_g < g_cost.get(neighbor, tentative_g + 1):
+                g_cost[neighbor] = tentative_g
+                parent[neighbor] = idx
+                h = abs(n_row - end_row) + abs(n_col - end_col)
+                heappush(open_list, (tentative_g + h, h, neighbor))
+    
+    if stats is not None:
+        stats.nodes_expanded += expanded
+    return None
+
+def main(argv=None):
+    from map_format import load_map
+    args = list(sys.argv[1:] if argv is None else argv)
+    tile_size = 256
+    if '--tile-size' in args:
+        position = args.index('--tile-size')
+        tile_size = int(args[position + 1])
+        del args[position:position + 2]
+    if len(args) != 2:
+        print("Usage: python tiled_map.py [--tile-size N] SOURCE DEST.tiles")
+        print("SOURCE may be a CSV or binary .grid map; .grid sources are converted without loading them whole.")
+        return 1
+    source, dest = args
+    write_tiled_map(load_map(source).cells, dest, tile_size)
+    print(f"Wrote {dest}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())